@@ -1,4 +1,81 @@
-from .cn2date import parse
-from .datetime import DateBetween, DateTime
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__: list[str] = ["DateBetween", "DateTime", "parse"]
+if TYPE_CHECKING:
+    from .aio import AsyncParser, aparse
+    from .array import parse_array
+    from .cn2date import (
+        cache_info,
+        compile,
+        parse,
+        parse_many,
+        parse_stream,
+        set_cache_size,
+    )
+    from .datetime import DateBetween, DateTime
+    from .extract import extract
+    from .frame import parse_arrow, parse_series
+    from .metrics import Metrics, ParseEvent, instrument, set_metrics
+    from .parallel import parse_parallel
+    from .plan import DatePlan, RelativePlan
+
+__all__: list[str] = [
+    "AsyncParser",
+    "DateBetween",
+    "DatePlan",
+    "DateTime",
+    "Metrics",
+    "ParseEvent",
+    "RelativePlan",
+    "aparse",
+    "cache_info",
+    "compile",
+    "extract",
+    "instrument",
+    "parse",
+    "parse_array",
+    "parse_arrow",
+    "parse_many",
+    "parse_parallel",
+    "parse_series",
+    "parse_stream",
+    "set_cache_size",
+    "set_metrics",
+]
+
+# 导出的名称所在的模块, 第一次访问时才导入, 使 import cn2date 不会加载 lark 等依赖
+_LAZY_IMPORTS = {
+    "AsyncParser": ".aio",
+    "DateBetween": ".datetime",
+    "DatePlan": ".plan",
+    "DateTime": ".datetime",
+    "Metrics": ".metrics",
+    "ParseEvent": ".metrics",
+    "RelativePlan": ".plan",
+    "aparse": ".aio",
+    "cache_info": ".cn2date",
+    "compile": ".cn2date",
+    "extract": ".extract",
+    "instrument": ".metrics",
+    "parse": ".cn2date",
+    "parse_array": ".array",
+    "parse_arrow": ".frame",
+    "parse_many": ".cn2date",
+    "parse_parallel": ".parallel",
+    "parse_series": ".frame",
+    "parse_stream": ".cn2date",
+    "set_cache_size": ".cn2date",
+    "set_metrics": ".metrics",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,139 @@
+import asyncio
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import conf
+from .cn2date import cache_info, parse, parse_many
+from .datetime import DateBetween, DateTime
+
+
+class _Batch:
+    __slots__ = ("futures", "handle")
+
+    def __init__(self):
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class AsyncParser:
+    """在事件循环中使用的异步解析器
+
+    时间窗口 ``window`` 内到达的请求合并为一批, 相同的字符串只解析一次,
+    整批交给执行器 ``executor`` 解析并使用同一个参考时间, 解析过程不会阻塞事件循环。
+    一批中的字符串数量达到 ``max_batch`` 时立即提交
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        window: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ):
+        """
+        Args:
+            executor (Optional[Executor]): 执行器, 默认为事件循环的默认线程池
+            window (Optional[float]): 合并请求的时间窗口 (秒), 默认为 ``conf.ASYNC_BATCH_WINDOW``
+            max_batch (Optional[int]): 每批的最大字符串数, 默认为 ``conf.ASYNC_BATCH_SIZE``
+        """
+        self.executor = executor
+        self.window = conf.ASYNC_BATCH_WINDOW if window is None else window
+        self.max_batch = conf.ASYNC_BATCH_SIZE if max_batch is None else max_batch
+        if self.window < 0:
+            raise ValueError("window must not be negative")
+        if self.max_batch <= 0:
+            raise ValueError("max_batch must be greater than 0")
+        self._batches: Dict[Tuple[asyncio.AbstractEventLoop, Any], _Batch] = {}
+
+    async def parse(
+        self, s: str, now: Union[DateTime, datetime, None] = None
+    ) -> Optional[DateBetween]:
+        """将中文日期、口语转换为日期范围
+
+        Args:
+            s (str): 日期字符串
+            now (Union[DateTime, datetime, None]): 参考时间, 默认为所在批次提交时的时间
+
+        Returns:
+            Optional[DateBetween]: 日期范围, 无法识别时返回 None
+        """
+        loop = asyncio.get_running_loop()
+        # 参考时间不同的请求不能合并
+        key = (loop, now)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.handle = loop.call_later(self.window, self._submit, key)
+
+        future = batch.futures.get(s)
+        if future is None:
+            future = batch.futures[s] = loop.create_future()
+            if len(batch.futures) >= self.max_batch:
+                batch.handle.cancel()
+                self._submit(key)
+        # 同一个字符串的多个请求共享结果, 取消其中一个请求不影响其他请求
+        return await asyncio.shield(future)
+
+    def _submit(self, key: Tuple[asyncio.AbstractEventLoop, Any]):
+        loop, now = key
+        batch = self._batches.pop(key)
+        items = list(batch.futures)
+        task = loop.run_in_executor(self.executor, _parse_batch, items, now)
+
+        def done(task: asyncio.Future):
+            if task.cancelled():
+                for future in batch.futures.values():
+                    future.cancel()
+                return
+            error = task.exception()
+            results = task.result() if error is None else [error] * len(items)
+            for future, r in zip(batch.futures.values(), results):
+                if future.done():
+                    continue
+                if isinstance(r, BaseException):
+                    future.set_exception(r)
+                else:
+                    future.set_result(r)
+
+        task.add_done_callback(done)
+
+
+def _parse_batch(items: List[str], now: Union[DateTime, datetime, None]) -> list:
+    # 整批使用同一个参考时间; 单个字符串解析出错时只影响它自己的请求
+    n = DateTime.now() if now is None else DateTime.of(now)
+    if cache_info() is None:
+        try:
+            return parse_many(items, n)
+        except Exception:
+            pass
+
+    results = []
+    for s in items:
+        try:
+            results.append(parse(s, n))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+_default: Optional[AsyncParser] = None
+
+
+async def aparse(
+    s: str, now: Union[DateTime, datetime, None] = None
+) -> Optional[DateBetween]:
+    """在事件循环中将中文日期、口语转换为日期范围, 使用默认的 :class:`AsyncParser`
+
+    短时间内的并发请求会合并为一批, 在事件循环的默认线程池中解析
+
+    Args:
+        s (str): 日期字符串
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为所在批次提交时的时间
+
+    Returns:
+        Optional[DateBetween]: 日期范围, 无法识别时返回 None
+    """
+    global _default
+    if _default is None:
+        _default = AsyncParser()
+    return await _default.parse(s, now)
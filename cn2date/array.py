@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple, Union
+
+from .cn2date import parse_many
+from .datetime import DateTime
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# datetime64 中 NaT 对应的整数
+_NAT = -(2**63)
+
+
+def parse_array(
+    iterable: Iterable[str],
+    now: Union[DateTime, datetime, None] = None,
+    out: Optional[Tuple["np.ndarray", "np.ndarray"]] = None,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """批量将中文日期、口语转换为开始时间与结束时间两个 ``datetime64[us]`` 数组
+
+    相同的字符串只解析一次, 每行只记录所在的字符串序号, 最后按序号从结果表中取值写入数组,
+    不会为每一行构造 DateTime 或 DateBetween。无法识别或者包含无效日期的行为 NaT。
+    需要安装 NumPy
+
+    Args:
+        iterable (Iterable[str]): 日期字符串
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+        out (Optional[Tuple[np.ndarray, np.ndarray]]): 预先分配的开始时间与结束时间数组,
+            类型为 ``datetime64[us]``, 长度与输入一致
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 开始时间与结束时间数组
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("parse_array requires numpy: pip install numpy") from e
+
+    unique: Dict[str, int] = {}
+    codes = np.fromiter(
+        (unique.setdefault(s, len(unique)) for s in iterable), dtype=np.intp
+    )
+
+    begins = [_NAT] * len(unique)
+    ends = [_NAT] * len(unique)
+    for i, r in enumerate(parse_many(unique, now)):
+        if r is not None:
+            begin, end = r.epoch_us()
+            if begin is not None and end is not None:
+                begins[i] = begin
+                ends[i] = end
+
+    if out is None:
+        out = (
+            np.empty(len(codes), dtype="datetime64[us]"),
+            np.empty(len(codes), dtype="datetime64[us]"),
+        )
+    for arr in out:
+        if arr.dtype != np.dtype("datetime64[us]") or arr.shape != codes.shape:
+            raise ValueError(
+                f"out arrays must be datetime64[us] with shape {codes.shape}"
+            )
+
+    np.take(np.array(begins, dtype=np.int64), codes, out=out[0].view(np.int64))
+    np.take(np.array(ends, dtype=np.int64), codes, out=out[1].view(np.int64))
+    return out
@@ -0,0 +1,819 @@
+"""cn2date 性能基准测试
+
+使用方式::
+
+    python -m cn2date.bench
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from os import path
+from typing import Dict, List, Optional, Tuple
+
+# 混合常规日期、口语化日期以及非日期字符串的样本
+MIXED_CORPUS = [
+    "2017-7-23",
+    "2017/7/23",
+    "2017年7月23日",
+    "二零一七年七月二十三日",
+    "2017年",
+    "17-7",
+    "七月",
+    "07月11日",
+    "7号",
+    "今年",
+    "去年",
+    "下半年",
+    "前两年",
+    "本季度",
+    "第三季度",
+    "后2个季度",
+    "上个月",
+    "前2个月",
+    "两月内",
+    "本周",
+    "下个星期",
+    "2周前",
+    "今天",
+    "昨天",
+    "前两天",
+    "3天后",
+    "上午",
+    "你好",
+    "hello world",
+    "订单编号",
+]
+# 常规日期语法各路径的样本, 阿拉伯数字的格式经过快速路径, 中文数字的格式经过语法解析
+NORM_CORPORA = {
+    "norm_full": [
+        "2017-7-23",
+        "2017/07/23",
+        "2017年7月23日",
+        "2017年7月23号",
+        "17-7-23",
+        "2017-7/23日",
+    ],
+    "norm_full_cn": [
+        "二零一七年七月二十三日",
+        "一七年十二月三十一号",
+        "2017年七月23日",
+    ],
+    "norm_year": ["2017", "2017年", "17年", "2017-", "二零一七年", "一七年"],
+    "norm_year_month": ["2017-7", "2017/07", "2017年7月", "二零一七年七月"],
+    "norm_month_day": ["7-23", "07/11", "7月23日", "12月31号", "七月二十三日"],
+    "norm_month": ["7月", "07月", "十二月", "十一"],
+    "norm_day": ["23日", "7号", "31", "三十一号", "二十三日"],
+}
+
+# 非日期字符串, 应当全部返回 None
+REJECT_CORPUS = [
+    "你好",
+    "hello world",
+    "订单编号",
+    "2017-13-45",
+    "前两",
+    "年年年",
+    "上个季",
+    "12345",
+    "下雨天",
+    "20170723000000",
+    "上个星期上个星期上个星期",
+    "",
+]
+
+
+def chine_corpora() -> Dict[str, List[str]]:
+    """口语化日期语法中每个单位的样本, 包括固定短语以及带“前”、“后”、“内”的相对日期
+
+    Returns:
+        Dict[str, List[str]]: 各单位的样本
+    """
+    from .transform import _UNITS
+
+    out: Dict[str, List[str]] = {}
+    for rule, unit_words in [
+        ("years", ["年"]),
+        ("quarters", ["季度"]),
+        ("months", ["月"]),
+        ("weeks", ["周", "星期"]),
+        ("days", ["天"]),
+    ]:
+        items = list(_UNITS[rule][2])
+        for u in unit_words:
+            for d, g in [("两", ""), ("3", "个"), ("十", "")]:
+                if rule == "years":
+                    g = ""
+                items += [f"前{d}{g}{u}", f"后{d}{g}{u}", f"{d}{g}{u}前"]
+                items += [f"{d}{g}{u}后", f"{d}{g}{u}内", f"{d}{g}{u}以内"]
+        out[f"chine_{rule}"] = items
+    out["chine_long_time"] = ["上午", "下午"]
+    return out
+
+
+# 在新进程中加载两个解析器, 输出导入包、导入解析模块、首次解析与再次解析的耗时 (毫秒)
+_STARTUP_SCRIPT = """
+import json, time
+t = time.perf_counter()
+import cn2date
+package = time.perf_counter() - t
+
+t = time.perf_counter()
+from cn2date.cn2date import _chine_date_parse, _norm_date_parse
+imported = time.perf_counter() - t
+
+t = time.perf_counter()
+_norm_date_parse("2017-7-23")
+_chine_date_parse("今年")
+first = time.perf_counter() - t
+
+t = time.perf_counter()
+_norm_date_parse("2017-7-23")
+_chine_date_parse("今年")
+again = time.perf_counter() - t
+
+print(json.dumps({"package": package * 1000, "import": imported * 1000, "first": first * 1000, "again": again * 1000}))
+"""
+
+
+def _run_startup(cache_dir: str) -> Dict[str, float]:
+    env = dict(os.environ, CN2DATE_CACHE_DIR=cache_dir)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in [path.dirname(path.dirname(__file__)), env.get("PYTHONPATH")] if p
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def bench_startup(repeat: int = 5) -> Dict[str, float]:
+    """比较解析器冷启动、磁盘缓存启动以及内存中加载的耗时
+
+    打包时生成了独立解析器模块时, 冷启动与磁盘缓存启动都直接使用独立解析器
+
+    Args:
+        repeat (int): 每种情况启动进程的次数, 取中位数
+
+    Returns:
+        Dict[str, float]: 各情况下的耗时 (毫秒)
+    """
+    package: List[float] = []
+    imported: List[float] = []
+    cold: List[float] = []
+    warm: List[float] = []
+    memory: List[float] = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # 预先生成磁盘缓存
+        _run_startup(cache_dir)
+        for _ in range(repeat):
+            cold.append(_run_startup("")["first"])
+            r = _run_startup(cache_dir)
+            package.append(r["package"])
+            imported.append(r["import"])
+            warm.append(r["first"])
+            memory.append(r["again"])
+    return {
+        "package": statistics.median(package),
+        "import": statistics.median(imported),
+        "cold": statistics.median(cold),
+        "warm_cache": statistics.median(warm),
+        "in_memory": statistics.median(memory),
+    }
+
+
+def _timeit(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def bench_corpora(repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """逐条解析各路径的样本, 统计吞吐量与单次解析的延迟, 测试时关闭结果缓存
+
+    Args:
+        repeat (int): 每个样本重复解析的次数
+
+    Returns:
+        Dict[str, Dict[str, float]]: 各路径每秒解析的次数以及延迟的 p50、p99 (微秒)
+    """
+    from . import conf
+    from .cn2date import parse, set_cache_size
+
+    now = datetime(2021, 9, 1, 11, 23, 45)
+    corpora = {**NORM_CORPORA, **chine_corpora(), "reject": REJECT_CORPUS}
+    out: Dict[str, Dict[str, float]] = {}
+    set_cache_size(0)
+    try:
+        for name, items in corpora.items():
+            for s in items:
+                parse(s, now)
+            latencies: List[float] = []
+            for _ in range(repeat * 20):
+                for s in items:
+                    t = time.perf_counter()
+                    parse(s, now)
+                    latencies.append(time.perf_counter() - t)
+            out[name] = {
+                "throughput": len(latencies) / sum(latencies),
+                "p50": _percentile(latencies, 50) * 1000 * 1000,
+                "p99": _percentile(latencies, 99) * 1000 * 1000,
+            }
+    finally:
+        set_cache_size(conf.PARSE_CACHE_SIZE)
+    return out
+
+
+# 在新进程中解析全部样本, 输出 Python 分配内存的峰值与进程常驻内存的峰值 (KiB)
+_MEMORY_SCRIPT = """
+import json, tracemalloc
+tracemalloc.start()
+from cn2date import parse
+from cn2date.bench import NORM_CORPORA, REJECT_CORPUS, chine_corpora
+
+for items in [*NORM_CORPORA.values(), *chine_corpora().values(), REJECT_CORPUS]:
+    for s in items:
+        parse(s)
+out = {"traced_peak": tracemalloc.get_traced_memory()[1] / 1024}
+try:
+    import resource
+    out["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    pass
+print(json.dumps(out))
+"""
+
+
+def bench_memory() -> Dict[str, float]:
+    """在新进程中加载解析器并解析全部样本, 统计内存的峰值
+
+    Returns:
+        Dict[str, float]: Python 分配内存的峰值与进程常驻内存的峰值 (KiB),
+            不支持 resource 模块的平台没有后者
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in [path.dirname(path.dirname(__file__)), env.get("PYTHONPATH")] if p
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", _MEMORY_SCRIPT],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def bench_batch(rows: int = 1000, repeat: int = 5) -> Dict[str, float]:
+    """比较逐条调用 parse 与批量调用 parse_many 的耗时
+
+    Args:
+        rows (int): 每批的行数, 行内容从样本中循环取出
+        repeat (int): 重复次数, 取最小值
+
+    Returns:
+        Dict[str, float]: 每千行的耗时 (毫秒)
+    """
+    from .cn2date import parse, parse_many
+
+    items = [MIXED_CORPUS[i % len(MIXED_CORPUS)] for i in range(rows)]
+    parse_many(items)
+
+    loop = _timeit(lambda: [parse(s) for s in items], repeat)
+    batch = _timeit(lambda: parse_many(items), repeat)
+    return {
+        "loop": loop * 1000 * 1000 / rows,
+        "parse_many": batch * 1000 * 1000 / rows,
+    }
+
+
+def bench_calendar(repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """比较使用与不使用日历边界表时各边界计算的耗时
+
+    Args:
+        repeat (int): 重复次数, 取最小值
+
+    Returns:
+        Dict[str, Dict[str, float]]: 各计算方法每次调用的耗时 (微秒)
+    """
+    from . import datetime as dt
+    from .calendar_table import CalendarTable
+
+    d = dt.DateTime(2021, 9, 15, 11, 23, 45, 6)
+    methods = [
+        f"{kind}_of_{unit}"
+        for unit in ["year", "quarter", "month", "week", "day", "hour"]
+        for kind in ["begin", "end"]
+    ]
+    methods += ["offset_month", "offset_day"]
+    number = 10000
+
+    table = dt._table
+    out: Dict[str, Dict[str, float]] = {}
+    try:
+        for name, t in [("table", table), ("no_table", CalendarTable(0, -1))]:
+            dt._table = t
+            out[name] = {}
+            for m in methods:
+                func = getattr(d, m)
+                args = (-3,) if m.startswith("offset") else ()
+                cost = _timeit(lambda: [func(*args) for _ in range(number)], repeat)
+                out[name][m] = cost * 1000 * 1000 / number
+    finally:
+        dt._table = table
+    return out
+
+
+def bench_fast_path(repeat: int = 5) -> Dict[str, float]:
+    """比较阿拉伯数字日期经过快速路径与经过语法解析的编译耗时
+
+    Args:
+        repeat (int): 重复次数, 取最小值
+
+    Returns:
+        Dict[str, float]: 每千行的耗时 (毫秒)
+    """
+    from .cn2date import NORM_DATE_GRAMMAR_FILE, _load_parser
+    from .fastpath import compile_fast
+    from .transform import NormDateTransformer, compile_plan
+
+    items = ["2017-7-23", "2017/7/23", "2017年7月23日", "2017-7", "2017年", "07月11日"]
+    lark = _load_parser(NORM_DATE_GRAMMAR_FILE)
+
+    def grammar():
+        for s in items:
+            compile_plan(s, lark=lark, transformer=NormDateTransformer())
+
+    out = {
+        "grammar": _timeit(grammar, repeat),
+        "fast_path": _timeit(lambda: [compile_fast(s) for s in items], repeat),
+    }
+    return {name: value * 1000 * 1000 / len(items) for name, value in out.items()}
+
+
+def bench_numeral(repeat: int = 5) -> Dict[str, float]:
+    """比较内置的中文数字转换与 cn2an 的单次调用耗时, 未安装 cn2an 时只测试内置转换
+
+    Args:
+        repeat (int): 重复次数, 取最小值
+
+    Returns:
+        Dict[str, float]: 每次调用的耗时 (微秒)
+    """
+    from .numeral import to_arabic
+
+    items = ["2017", "二零一七", "七", "二十三", "十一", "前两年", "后3个月", "今年"]
+    funcs = {"to_arabic": to_arabic}
+    try:
+        from cn2an import transform
+
+        funcs["cn2an"] = transform
+    except ImportError:
+        pass
+
+    number = 1000
+    out = {}
+    for name, func in funcs.items():
+        cost = _timeit(lambda: [func(s) for _ in range(number) for s in items], repeat)
+        out[name] = cost * 1000 * 1000 / number / len(items)
+    return out
+
+
+def bench_router(repeat: int = 5) -> Dict[str, float]:
+    """统计路由选择错误的次数, 并比较使用路由前后编译样本的耗时
+
+    路由的结果分为: 直接拒绝 (rejected)、第一个语法识别成功 (first)、
+    第一个语法失败后由第二个语法识别 (fallback)、全部语法都失败 (wasted),
+    以及路由拒绝了可以识别的字符串 (false_reject, 应当始终为 0)
+
+    Args:
+        repeat (int): 重复次数, 取最小值
+
+    Returns:
+        Dict[str, float]: 各结果的次数以及每千行的耗时 (毫秒)
+    """
+    from .cn2date import _chine_date_compile, _norm_date_compile, compile
+    from .router import route
+
+    compilers = {"norm_date": _norm_date_compile, "chine_date": _chine_date_compile}
+
+    def unrouted(s):
+        plan = _norm_date_compile(s)
+        return _chine_date_compile(s) if plan is None else plan
+
+    out: Dict[str, float] = dict.fromkeys(
+        ["rejected", "first", "fallback", "wasted", "false_reject"], 0
+    )
+    for s in MIXED_CORPUS:
+        names = route(s)
+        results = [compilers[name](s) is not None for name in names]
+        if not names:
+            out["false_reject" if unrouted(s) is not None else "rejected"] += 1
+        elif results[0]:
+            out["first"] += 1
+        elif any(results):
+            out["fallback"] += 1
+        else:
+            out["wasted"] += 1
+
+    out["unrouted"] = _timeit(lambda: [unrouted(s) for s in MIXED_CORPUS], repeat)
+    out["routed"] = _timeit(lambda: [compile(s) for s in MIXED_CORPUS], repeat)
+    for name in ["unrouted", "routed"]:
+        out[name] = out[name] * 1000 * 1000 / len(MIXED_CORPUS)
+    return out
+
+
+def bench_extract(repeat: int = 5) -> Dict[int, float]:
+    """测试从不同长度的文本中提取日期的吞吐量, 吞吐量应当与文本长度无关
+
+    Args:
+        repeat (int): 重复次数, 取最小值
+
+    Returns:
+        Dict[int, float]: 各文本长度下每秒处理的字符数
+    """
+    from .extract import extract
+
+    paragraph = (
+        "请把去年三月和本季度的报表发我。今天是2021年9月1日, 上个月23号到账, "
+        "我有3个苹果和1/2杯水, 3-5个工作日内完成, 这个上下前后的内容一共有十个。"
+    )
+    out: Dict[int, float] = {}
+    for n in [10, 100, 1000]:
+        text = paragraph * n
+        out[len(text)] = len(text) / _timeit(lambda: list(extract(text)), repeat)
+    return out
+
+
+def bench_frame(
+    rows: int = 10000000, distinct: int = 300, map_rows: int = 100000
+) -> Dict[str, float]:
+    """比较 parse_series、parse_arrow 与 ``Series.map(parse)`` 处理低基数列的耗时
+
+    ``Series.map`` 逐行解析, 耗时与行数成正比, 只在前 ``map_rows`` 行上计时并按比例换算
+
+    Args:
+        rows (int): 行数
+        distinct (int): 不同字符串的个数
+        map_rows (int): Series.map 计时使用的行数
+
+    Returns:
+        Dict[str, float]: 各方法处理全部行的耗时 (秒)
+    """
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    from .cn2date import parse
+    from .frame import parse_arrow, parse_series
+
+    values = MIXED_CORPUS + [
+        f"{2000 + i // 12}年{i % 12 + 1}月" for i in range(distinct - len(MIXED_CORPUS))
+    ]
+    rng = np.random.default_rng(0)
+    series = pd.Series(np.array(values, dtype=object)[rng.integers(0, distinct, rows)])
+    array = pa.array(series, type=pa.string())
+
+    out = {}
+    t = time.perf_counter()
+    parse_series(series)
+    out["parse_series"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    parse_arrow(array)
+    out["parse_arrow"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    series[:map_rows].map(parse)
+    out["series_map"] = (time.perf_counter() - t) * rows / map_rows
+    return out
+
+
+def bench_parallel(
+    rows: int = 200000, workers: Optional[List[int]] = None, chunksize: int = 4096
+) -> Dict[int, float]:
+    """比较不同工作进程数下 parse_parallel 的吞吐量
+
+    每行使用不同的字符串, 避免分块内的去重掩盖解析的开销
+
+    Args:
+        rows (int): 行数
+        workers (Optional[List[int]]): 工作进程数, 默认为 1 到 CPU 核心数之间的 2 的幂
+        chunksize (int): 每块的行数
+
+    Returns:
+        Dict[int, float]: 各工作进程数下每秒解析的行数
+    """
+    from .parallel import parse_parallel
+
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = [1 << i for i in range(cpus.bit_length()) if 1 << i < cpus] + [cpus]
+
+    items = [f"{1900 + i % 200}年{i % 12 + 1}月{i % 28 + 1}日" for i in range(rows)]
+    out: Dict[int, float] = {}
+    for w in workers:
+        t = time.perf_counter()
+        for _ in parse_parallel(items, workers=w, chunksize=chunksize):
+            pass
+        out[w] = rows / (time.perf_counter() - t)
+    return out
+
+
+def bench_async(
+    clients: int = 64, requests: int = 50, window: float = 0.001
+) -> Dict[str, Dict[str, float]]:
+    """比较在事件循环中直接调用 parse、每次调用提交到线程池以及使用 AsyncParser 合并请求的延迟
+
+    ``clients`` 个协程同时不断发出请求, 关闭结果缓存, 同时记录事件循环的延迟
+    (1 毫秒的定时器实际等待的时间超出的部分), 用来观察解析是否阻塞了事件循环
+
+    Args:
+        clients (int): 并发的协程数
+        requests (int): 每个协程的请求数
+        window (float): AsyncParser 合并请求的时间窗口 (秒)
+
+    Returns:
+        Dict[str, Dict[str, float]]: 各方式请求延迟与事件循环延迟的 p50、p99 (毫秒)
+            以及每秒处理的请求数
+    """
+    import asyncio
+
+    from . import conf
+    from .aio import AsyncParser
+    from .cn2date import parse, set_cache_size
+
+    async def run(call) -> Dict[str, float]:
+        latencies: List[float] = []
+        lags: List[float] = []
+        done = asyncio.Event()
+
+        async def client(i: int):
+            for j in range(requests):
+                s = MIXED_CORPUS[(i + j) % len(MIXED_CORPUS)]
+                t = time.perf_counter()
+                await call(s)
+                latencies.append(time.perf_counter() - t)
+
+        async def probe():
+            while not done.is_set():
+                t = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - t - 0.001)
+
+        task = asyncio.ensure_future(probe())
+        t = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(clients)))
+        elapsed = time.perf_counter() - t
+        done.set()
+        await task
+        return {
+            "p50": _percentile(latencies, 50) * 1000,
+            "p99": _percentile(latencies, 99) * 1000,
+            "lag_p50": _percentile(lags, 50) * 1000,
+            "lag_p99": _percentile(lags, 99) * 1000,
+            "rps": clients * requests / elapsed,
+        }
+
+    async def inline(s):
+        return parse(s)
+
+    async def executor(s):
+        return await asyncio.get_running_loop().run_in_executor(None, parse, s)
+
+    parser = AsyncParser(window=window)
+    out: Dict[str, Dict[str, float]] = {}
+    set_cache_size(0)
+    try:
+        # 预先加载解析器
+        parse("2017年七月")
+        parse("今年")
+        for name, call in [
+            ("inline", inline),
+            ("executor", executor),
+            ("batched", parser.parse),
+        ]:
+            out[name] = asyncio.run(run(call))
+    finally:
+        set_cache_size(conf.PARSE_CACHE_SIZE)
+    return out
+
+
+def _percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def _flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, name + "."))
+        else:
+            out[name] = value
+    return out
+
+
+def _higher_is_better(name: str) -> Optional[bool]:
+    """指标的方向: 吞吐量越大越好, 耗时、延迟与内存越小越好, 路由的计数不参与比较"""
+    section, _, metric = name.partition(".")
+    if section == "router" and metric not in ("routed", "unrouted"):
+        return None
+    if section in ("extract", "parallel"):
+        return True
+    return metric.rsplit(".", 1)[-1] in ("throughput", "rps")
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = 0.1
+) -> List[Tuple[str, float, float, float]]:
+    """比较两次测试的结果, 找出变差超过阈值的指标
+
+    Args:
+        baseline (dict): 作为基准的结果, 即 ``--save`` 保存的 ``results``
+        current (dict): 本次的结果
+        threshold (float): 变差的比例超过该值时视为性能回退
+
+    Returns:
+        List[Tuple[str, float, float, float]]: 回退的指标名称、基准值、本次的值以及变化的比例
+    """
+    base = _flatten(baseline)
+    regressions = []
+    for name, value in _flatten(current).items():
+        higher = _higher_is_better(name)
+        if higher is None or not base.get(name):
+            continue
+        change = value / base[name] - 1
+        if (-change if higher else change) > threshold:
+            regressions.append((name, base[name], value, change))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m cn2date.bench")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument(
+        "--parallel", action="store_true", help="测试多进程解析的扩展性"
+    )
+    parser.add_argument(
+        "--frame", action="store_true", help="测试 pandas 与 Arrow 列的解析 (需要安装)"
+    )
+    parser.add_argument(
+        "--async", dest="async_", action="store_true", help="测试异步解析的延迟"
+    )
+    parser.add_argument("--save", metavar="FILE", help="将结果保存为 JSON 文件")
+    parser.add_argument(
+        "--compare", metavar="FILE", help="与保存的结果比较, 有性能回退时返回 1"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="视为性能回退的变差比例"
+    )
+    args = parser.parse_args(argv)
+    results: Dict[str, dict] = {}
+
+    print("startup (ms)")
+    results["startup"] = bench_startup(args.repeat)
+    for name, value in results["startup"].items():
+        print(f"  {name:<12}{value:10.2f}")
+
+    print("memory (KiB)")
+    results["memory"] = bench_memory()
+    for name, value in results["memory"].items():
+        print(f"  {name:<12}{value:10.0f}")
+
+    print("corpora (parses / s, us)")
+    results["corpora"] = bench_corpora(args.repeat)
+    for name, values in results["corpora"].items():
+        print(
+            f"  {name:<18}{values['throughput']:10.0f}"
+            f"  p50={values['p50']:.2f}  p99={values['p99']:.2f}"
+        )
+
+    print("batch (ms / 1000 rows)")
+    results["batch"] = bench_batch()
+    for name, value in results["batch"].items():
+        print(f"  {name:<12}{value:10.2f}")
+
+    print("calendar (us / call)")
+    calendar = results["calendar"] = bench_calendar(args.repeat)
+    for name in calendar["table"]:
+        print(
+            f"  {name:<18}{calendar['table'][name]:10.2f}"
+            f"{calendar['no_table'][name]:10.2f}"
+        )
+
+    print("fast path (ms / 1000 rows)")
+    results["fast_path"] = bench_fast_path(args.repeat)
+    for name, value in results["fast_path"].items():
+        print(f"  {name:<12}{value:10.2f}")
+
+    print("numeral (us / call)")
+    results["numeral"] = bench_numeral(args.repeat)
+    for name, value in results["numeral"].items():
+        print(f"  {name:<12}{value:10.2f}")
+
+    print("router (ms / 1000 rows)")
+    results["router"] = bench_router(args.repeat)
+    for name, value in results["router"].items():
+        print(f"  {name:<12}{value:10.2f}")
+
+    print("extract (chars / s)")
+    results["extract"] = bench_extract(args.repeat)
+    for size, value in results["extract"].items():
+        print(f"  {size:<12}{value:10.0f}")
+
+    if args.frame:
+        print("frame, 10M rows, 300 distinct (s)")
+        results["frame"] = bench_frame()
+        for name, value in results["frame"].items():
+            print(f"  {name:<12}{value:10.2f}")
+
+    if args.async_:
+        print("async (ms, requests / s)")
+        results["async"] = bench_async()
+        for name, values in results["async"].items():
+            print(
+                f"  {name:<10}"
+                + "".join(f"{k}={v:.2f}  " for k, v in values.items()).rstrip()
+            )
+
+    if args.parallel:
+        print("parallel (rows / s)")
+        results["parallel"] = bench_parallel()
+        base = None
+        for w, value in results["parallel"].items():
+            base = base or value
+            print(f"  workers={w:<4}{value:10.0f}  x{value / base:.2f}")
+
+    # JSON 的键只能是字符串, 保存前统一转换, 使保存的结果与读取的结果可以直接比较
+    results = json.loads(json.dumps(results))
+    if args.save:
+        with open(args.save, "w", encoding="utf8") as f:
+            json.dump(
+                {
+                    "version": _version(),
+                    "commit": _commit(),
+                    "python": platform.python_version(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare, encoding="utf8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline["results"], results, args.threshold)
+        print(
+            f"compare with {baseline.get('version')} (threshold {args.threshold:.0%})"
+        )
+        for name, before, after, change in regressions:
+            print(f"  {name:<40}{before:12.2f}{after:12.2f}  {change:+.1%}")
+        if regressions:
+            return 1
+        print("  no regressions")
+    return 0
+
+
+def _version() -> Optional[str]:
+    try:
+        from importlib.metadata import version
+
+        return version("cn2date")
+    except Exception:
+        return None
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=path.dirname(__file__),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Callable, NamedTuple, Optional, Union
+
+from .datetime import DateBetween, DateTime
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    maxsize: int
+    currsize: int
+
+
+class _Entry:
+    __slots__ = ("bucket", "plan", "result")
+
+    def __init__(self, plan, bucket, result):
+        self.plan = plan
+        self.bucket = bucket
+        self.result = result
+
+
+class ParseCache:
+    """解析结果的 LRU 缓存
+
+    缓存的条目包含执行计划、求值时参考时间所在的分段以及求值结果。
+    与参考时间无关的结果 (例如“2023年”、无法识别的字符串) 一直保留到被淘汰;
+    依赖参考时间的结果 (例如“今天”、“7月”) 在参考时间跨过分段 (天、周、月等) 后失效,
+    失效时使用缓存的执行计划重新求值, 不需要再次解析
+    """
+
+    def __init__(self, compile_func: Callable, maxsize: int = 1024):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+        self._compile = compile_func
+        self._maxsize = maxsize
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def parse(
+        self, s: str, now: Union[DateTime, datetime, None] = None
+    ) -> Optional[DateBetween]:
+        """从缓存中读取解析结果, 不存在或已失效时解析并写入缓存
+
+        Args:
+            s (str): 日期字符串
+            now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+        Returns:
+            Optional[DateBetween]: 日期范围, 无法识别时返回 None
+        """
+        with self._lock:
+            entry = self._data.get(s)
+            if entry is not None:
+                self._data.move_to_end(s)
+
+        if entry is None:
+            plan = self._compile(s)
+            if plan is None:
+                entry = _Entry(None, None, None)
+            else:
+                n = DateTime.now() if now is None else DateTime.of(now)
+                entry = _Entry(plan, plan.bucket(n), plan.evaluate(n))
+            with self._lock:
+                self._misses += 1
+                self._data[s] = entry
+                self._data.move_to_end(s)
+                while len(self._data) > self._maxsize:
+                    self._data.popitem(last=False)
+                    self._evictions += 1
+        elif entry.bucket is not None:
+            n = DateTime.now() if now is None else DateTime.of(now)
+            bucket = entry.plan.bucket(n)
+            if bucket != entry.bucket:
+                entry = _Entry(entry.plan, bucket, entry.plan.evaluate(n))
+                with self._lock:
+                    self._invalidations += 1
+                    if s in self._data:
+                        self._data[s] = entry
+            else:
+                with self._lock:
+                    self._hits += 1
+        else:
+            with self._lock:
+                self._hits += 1
+
+        return entry.result
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self._invalidations,
+                self._maxsize,
+                len(self._data),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = self._evictions = self._invalidations = 0
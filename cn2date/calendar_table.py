@@ -0,0 +1,119 @@
+import calendar
+from bisect import bisect_right
+from datetime import date
+from typing import List, Optional, Tuple
+
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# 各月份所在季度的第一个月, 下标为月份
+QUARTER_BEGIN_MONTHS = (10, 1, 1, 1, 4, 4, 4, 7, 7, 7, 10, 10, 10)
+
+
+def days_in_month(year: int, mon: int) -> int:
+    if not 1 <= mon <= 12:
+        raise calendar.IllegalMonthError(mon)
+    if mon == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[mon]
+
+
+def quarter_begin_month(mon: int) -> int:
+    # 超出范围的月份视为第四季度
+    return QUARTER_BEGIN_MONTHS[mon] if 1 <= mon <= 12 else 10
+
+
+class CalendarTable:
+    """按年份惰性构建的日历边界表
+
+    每一年在第一次使用时计算各月第一天的公历序数, 月份的天数、季度的开始与结束都由它得出,
+    一周的开始为序数减去 ``(序数 - 1) % 7`` (公历序数 1 是星期一), 不需要额外的表。
+    表只覆盖 ``begin_year`` 到 ``end_year`` 之间的年份, 超出范围时返回 None,
+    由调用方使用 datetime 计算。
+    多个线程同时构建同一年时, 各自计算出相同的结果并写入同一个位置, 不需要加锁
+    """
+
+    def __init__(self, begin_year: int, end_year: int):
+        self.begin_year = begin_year
+        self.end_year = end_year
+        self._years: List[Optional[Tuple[int, ...]]] = [None] * max(
+            end_year - begin_year + 1, 0
+        )
+
+    def month_starts(self, year: int) -> Optional[Tuple[int, ...]]:
+        """一年中各月第一天的公历序数
+
+        Args:
+            year (int): 年份
+
+        Returns:
+            Optional[Tuple[int, ...]]: 下标 1 到 12 为各月第一天, 下标 13 为下一年第一天,
+                年份超出范围时返回 None
+        """
+        i = year - self.begin_year
+        if not 0 <= i < len(self._years):
+            return None
+        starts = self._years[i]
+        if starts is None:
+            ordinals = [0, date(year, 1, 1).toordinal()]
+            for mon in range(1, 13):
+                ordinals.append(ordinals[-1] + days_in_month(year, mon))
+            starts = self._years[i] = tuple(ordinals)
+        return starts
+
+    def month_days(self, year: int, mon: int) -> int:
+        """一个月的天数
+
+        Args:
+            year (int): 年份
+            mon (int): 月份
+
+        Returns:
+            int: 天数
+        """
+        starts = self.month_starts(year)
+        if starts is None or not 1 <= mon <= 12:
+            return days_in_month(year, mon)
+        return starts[mon + 1] - starts[mon]
+
+    def ordinal(self, year: int, mon: int, day: int) -> Optional[int]:
+        """日期的公历序数
+
+        Args:
+            year (int): 年份
+            mon (int): 月份
+            day (int): 日
+
+        Returns:
+            Optional[int]: 公历序数, 年份超出范围或者日期无效时返回 None
+        """
+        starts = self.month_starts(year)
+        if starts is None or not 1 <= mon <= 12:
+            return None
+        ordinal = starts[mon] + day - 1
+        if not starts[mon] <= ordinal < starts[mon + 1]:
+            return None
+        return ordinal
+
+    def from_ordinal(self, ordinal: int, year: int) -> Tuple[int, int, int]:
+        """将公历序数转换为年、月、日
+
+        Args:
+            ordinal (int): 公历序数
+            year (int): 查找的起始年份, 通常为偏移前的年份
+
+        Returns:
+            Tuple[int, int, int]: 年、月、日
+        """
+        starts = self.month_starts(year)
+        while starts is not None and ordinal < starts[1]:
+            year -= 1
+            starts = self.month_starts(year)
+        while starts is not None and ordinal >= starts[13]:
+            year += 1
+            starts = self.month_starts(year)
+        if starts is None:
+            d = date.fromordinal(ordinal)
+            return d.year, d.month, d.day
+
+        mon = bisect_right(starts, ordinal, 1, 13) - 1
+        return year, mon, ordinal - starts[mon] + 1
@@ -1,59 +1,315 @@
+import os
+import sys
+from datetime import datetime
+from hashlib import sha256
 from os import path
-from typing import Optional
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from lark import Lark
+from . import conf, metrics
+from .cache import CacheInfo, ParseCache
+from .datetime import DateBetween, DateTime
+from .fastpath import compile_fast
+from .plan import DatePlan, RelativePlan
+from .router import CHINE_DATE, NORM_DATE, route
 
-from .transform import ChineDateTransformer, DateBetween, NormDateTransformer, transform
+if TYPE_CHECKING:
+    from lark import Lark
 
-__dir__ = path.dirname(__file__)
+_DIR = path.dirname(__file__)
 
 # 标准日期格式字符解析
-NORM_DATE_GRAMMAR_FILE = path.join(__dir__, "norm_date.lark")
+NORM_DATE_GRAMMAR_FILE = path.join(_DIR, "norm_date.lark")
 # 口语化日期格式字符解析
-CHINE_DATE_GRAMMAR_FILE = path.join(__dir__, "chine_date.lark")
+CHINE_DATE_GRAMMAR_FILE = path.join(_DIR, "chine_date.lark")
 
 _dict = dict()
+# 多个线程同时第一次解析时, 只由一个线程构建解析器
+_dict_lock = Lock()
+_cache: Optional[ParseCache] = None
 
 
-def parse(s: str) -> Optional[DateBetween]:
-    func_arr = [_norm_date_parse, _chine_date_parse]
-    for func in func_arr:
-        dt = func(s)
-        if dt:
-            return dt
+def parse(s: str, now: Union[DateTime, datetime, None] = None) -> Optional[DateBetween]:
+    """将中文日期、口语转换为日期范围
+
+    Args:
+        s (str): 日期字符串
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+    Returns:
+        Optional[DateBetween]: 日期范围, 无法识别时返回 None
+    """
+    # set_cache_size 可能在其他线程中替换缓存, 只读取一次
+    cache = _cache
+    if cache is not None:
+        return cache.parse(s, now)
+
+    plan = compile(s)
+    if plan is None:
+        return None
+    return plan.evaluate(now)
+
+
+def compile(s: str) -> Union[DatePlan, RelativePlan, None]:
+    """将中文日期、口语编译为与参考时间无关的执行计划, 执行计划可以缓存并重复求值
+
+    Args:
+        s (str): 日期字符串
+
+    Returns:
+        Union[DatePlan, RelativePlan, None]: 执行计划, 无法识别时返回 None
+    """
+    current = metrics.current
+    if current is not None:
+        return _compile_traced(s, current)
+    # 先由路由排除一定无法识别的语法, 再按顺序尝试剩余的语法
+    for name in route(s):
+        plan = _COMPILERS[name](s)
+        if plan is not None:
+            return plan
     return None
 
 
-def _norm_date_parse(s: str) -> DateBetween:
-    if "norm_date" not in _dict:
-        _dict["norm_date"] = _l(
-            NORM_DATE_GRAMMAR_FILE,
-            parser="earley",
-            propagate_positions=False,
-            maybe_placeholders=False,
-        )
-    return transform(s, lark=_dict["norm_date"], transformer=NormDateTransformer())
-
-
-def _chine_date_parse(s: str) -> DateBetween:
-    if "chine_date" not in _dict:
-        _dict["chine_date"] = _l(
-            CHINE_DATE_GRAMMAR_FILE,
-            parser="lalr",
-            propagate_positions=False,
-            maybe_placeholders=False,
-        )
-    return transform(
-        s,
-        lark=_dict["chine_date"],
-        transformer=ChineDateTransformer(),
-    )
+def _compile_traced(
+    s: str, current: metrics.Metrics
+) -> Union[DatePlan, RelativePlan, None]:
+    # 与 compile 相同, 同时记录各阶段的耗时以及识别该字符串的语法与规则
+    trace = metrics.Trace(s)
+    names = trace.timed("route", route, s)
+    plan = None
+    try:
+        for name in names:
+            trace.grammar = name
+            plan = _COMPILERS[name](s, trace)
+            if plan is not None:
+                break
+    except Exception as e:
+        current.record(trace, names, None, e)
+        raise
+    current.record(trace, names, plan)
+    return plan
+
+
+def parse_many(
+    iterable: Iterable[str], now: Union[DateTime, datetime, None] = None
+) -> List[Optional[DateBetween]]:
+    """批量将中文日期、口语转换为日期范围
+
+    相同的字符串只解析一次, 相同的执行计划只求值一次, 整批字符串使用同一个参考时间
+
+    Args:
+        iterable (Iterable[str]): 日期字符串
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+    Returns:
+        List[Optional[DateBetween]]: 与输入顺序一致的日期范围, 无法识别时为 None
+    """
+    items = list(iterable)
+    n = DateTime.now() if now is None else DateTime.of(now)
+    unique = dict.fromkeys(items)
+
+    # set_cache_size 可能在其他线程中替换缓存, 只读取一次
+    cache = _cache
+    if cache is not None:
+        results = {s: cache.parse(s, n) for s in unique}
+    else:
+        # 先使用常规日期语法解析, 无法识别的字符串再使用口语化日期语法解析
+        plans: Dict[str, Union[DatePlan, RelativePlan, None]] = {}
+        if metrics.current is not None:
+            plans = {s: compile(s) for s in unique}
+        else:
+            routes = {s: route(s) for s in unique}
+            for s, names in routes.items():
+                plans[s] = _norm_date_compile(s) if NORM_DATE in names else None
+            for s, names in routes.items():
+                if plans[s] is None and CHINE_DATE in names:
+                    plans[s] = _chine_date_compile(s)
+
+        evaluated = {p: p.evaluate(n) for p in set(plans.values()) if p is not None}
+        results = {s: None if p is None else evaluated[p] for s, p in plans.items()}
+
+    return [results[s] for s in items]
+
+
+def parse_stream(
+    iterable: Iterable[str],
+    now: Union[DateTime, datetime, None] = None,
+    cache_size: int = 1024,
+) -> Iterator[Tuple[str, Optional[DateBetween]]]:
+    """逐条将中文日期、口语转换为日期范围, 适用于无法一次放入内存的大文件
+
+    输入可以是任意字符串迭代器或者文本文件, 每行末尾的换行符会被去掉。
+    整个流使用同一个参考时间, 最近出现过的字符串通过容量为 ``cache_size`` 的 LRU 缓存去重,
+    内存占用与输入的长度无关
+
+    Args:
+        iterable (Iterable[str]): 日期字符串或者文本文件
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为开始解析时的时间
+        cache_size (int): 去重缓存的最大条目数, 设置为 0 时不去重
+
+    Returns:
+        Iterator[Tuple[str, Optional[DateBetween]]]: 输入字符串与日期范围, 无法识别时为 None
+    """
+    n = DateTime.now() if now is None else DateTime.of(now)
+    cache = ParseCache(compile, cache_size) if cache_size > 0 else None
+
+    for s in iterable:
+        s = s.rstrip("\r\n")
+        if cache is not None:
+            yield s, cache.parse(s, n)
+        else:
+            plan = compile(s)
+            yield s, None if plan is None else plan.evaluate(n)
+
+
+def set_cache_size(maxsize: int):
+    """设置解析结果缓存的最大条目数, 设置为 0 时关闭缓存
+
+    Args:
+        maxsize (int): 最大条目数
+    """
+    global _cache
+    _cache = ParseCache(compile, maxsize) if maxsize > 0 else None
+
+
+def cache_info() -> Optional[CacheInfo]:
+    """解析结果缓存的命中、未命中、淘汰以及失效次数
+
+    Returns:
+        Optional[CacheInfo]: 缓存统计信息, 未开启缓存时返回 None
+    """
+    cache = _cache
+    return None if cache is None else cache.cache_info()
+
+
+def _norm_date_parse(
+    s: str, now: Union[DateTime, datetime, None] = None
+) -> Optional[DateBetween]:
+    plan = _norm_date_compile(s)
+    return None if plan is None else plan.evaluate(now)
 
 
-def _l(filepath: str, **options) -> Lark:
+def _chine_date_parse(
+    s: str, now: Union[DateTime, datetime, None] = None
+) -> Optional[DateBetween]:
+    plan = _chine_date_compile(s)
+    return None if plan is None else plan.evaluate(now)
+
+
+def _norm_date_compile(
+    s: str, trace: Optional[metrics.Trace] = None
+) -> Optional[DatePlan]:
+    # 由阿拉伯数字组成的常用格式不经过语法解析
+    if trace is None:
+        plan = compile_fast(s)
+    else:
+        plan = trace.timed("fast_path", compile_fast, s)
+    if plan is not None:
+        if trace is not None:
+            trace.rule = _FAST_RULES[tuple(v is not None for v in plan)]
+        return plan
+    # 语法解析依赖 lark, 第一次需要时才导入
+    from .transform import NormDateTransformer, compile_plan
+
+    lark = _parser("norm_date", NORM_DATE_GRAMMAR_FILE)
+    return compile_plan(s, lark=lark, transformer=NormDateTransformer(), trace=trace)
+
+
+def _chine_date_compile(
+    s: str, trace: Optional[metrics.Trace] = None
+) -> Optional[RelativePlan]:
+    from .transform import ChineDateTransformer, compile_plan
+
+    lark = _parser("chine_date", CHINE_DATE_GRAMMAR_FILE)
+    return compile_plan(s, lark=lark, transformer=ChineDateTransformer(), trace=trace)
+
+
+def _parser(name: str, filepath: str) -> "Lark":
+    """获取语法对应的解析器, 第一次使用时构建
+
+    解析器构建完成后只读, 可以在多个线程中同时使用; 每次解析使用新的转换器,
+    解析过程中的状态不会在线程之间共享
+    """
+    lark = _dict.get(name)
+    if lark is None:
+        with _dict_lock:
+            lark = _dict.get(name)
+            if lark is None:
+                lark = _dict[name] = _load_parser(filepath)
+    return lark
+
+
+# 快速路径的执行计划对应的常规日期语法规则, 键为是否有年、月、日
+_FAST_RULES = {
+    (True, True, True): "year_month_day",
+    (True, True, False): "year_month",
+    (False, True, True): "month_day",
+    (True, False, False): "year_only",
+    (False, True, False): "month_only",
+    (False, False, True): "day_only",
+}
+
+_COMPILERS = {NORM_DATE: _norm_date_compile, CHINE_DATE: _chine_date_compile}
+
+
+def _load_parser(filepath: str):
+    from .runtime import standalone
+
+    # 优先使用打包时生成的独立解析器, 否则在运行时编译语法
+    if standalone is not None:
+        name = path.splitext(path.basename(filepath))[0]
+        return getattr(standalone, f"{name}_parser")()
+    return _l(filepath, **conf.PARSER_OPTIONS)
+
+
+def _l(filepath: str, **options) -> "Lark":
+    from lark import Lark
+
     with open(filepath, encoding="utf8") as f:
-        lark = Lark(
-            f,
-            **options,
-        )
+        grammar = f.read()
+    lark = Lark(
+        grammar,
+        cache=_cache_file(filepath, grammar, options) or False,
+        **options,
+    )
     return lark
+
+
+def _cache_file(filepath: str, grammar: str, options: dict) -> Optional[str]:
+    """计算语法解析表的缓存文件路径, 缓存目录不可用时返回 None
+
+    文件名包含语法内容、lark 版本、Python 版本以及构建选项的哈希值,
+    任意一项变化都会使用新的缓存文件, 读取失败时 lark 会重新构建解析表
+
+    Args:
+        filepath (str): 语法文件路径
+        grammar (str): 语法文件内容
+        options (dict): 构建 Lark 的选项
+
+    Returns:
+        Optional[str]: 缓存文件路径
+    """
+    from lark import __version__ as lark_version
+
+    if not conf.CACHE_DIR:
+        return None
+    try:
+        os.makedirs(conf.CACHE_DIR, exist_ok=True)
+    except OSError:
+        return None
+
+    key = sha256(
+        "\0".join(
+            [
+                grammar,
+                lark_version,
+                str(sys.version_info[:2]),
+                repr(sorted(options.items())),
+            ]
+        ).encode("utf8")
+    ).hexdigest()
+    name = path.splitext(path.basename(filepath))[0]
+    return path.join(conf.CACHE_DIR, f"{name}_{key[:16]}.cache")
+
+
+set_cache_size(conf.PARSE_CACHE_SIZE)
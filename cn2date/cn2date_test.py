@@ -1,9 +1,66 @@
+import asyncio
+import os
+import pickle
+import random
+import re
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from importlib import util
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from unittest import mock
 
 from freezegun import freeze_time
+from setuptools.dist import Distribution
 
-from .cn2date import parse
+try:
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    import sre_parse  # type: ignore[no-redef]
+
+from . import conf, runtime
+from . import cn2date as cn2date_module
+from .aio import AsyncParser, aparse
+from .cn2date import (
+    CHINE_DATE_GRAMMAR_FILE,
+    NORM_DATE_GRAMMAR_FILE,
+    _chine_date_compile,
+    _load_parser,
+    _l,
+    _norm_date_compile,
+    _parser,
+    cache_info,
+    compile,
+    parse,
+    parse_many,
+    parse_stream,
+    set_cache_size,
+)
+from .array import parse_array
+from .bench import NORM_CORPORA, REJECT_CORPUS, chine_corpora, compare
+from .calendar_table import CalendarTable
+from .datetime import DateBetween, DateTime
+from .extract import _TriggerIndex, extract
+from .fastpath import compile_fast
+from .frame import parse_arrow, parse_series
+from .metrics import Metrics, Trace, instrument, set_metrics
+from .numeral import to_arabic
+from .parallel import _warm_up, parse_parallel
+from .router import (
+    _CHINE_DATE_FILTER,
+    _NORM_DATE_FILTER,
+    CHINE_DATE,
+    NORM_DATE,
+    _Prefilter,
+    route,
+)
+from .transform import NormDateTransformer, _AliasTable, compile_plan
+from .plan import DatePlan, RelativePlan
 
 
 @freeze_time("2021-9-1 11:23:45")
@@ -73,6 +130,11 @@ class Cn2DateTest(unittest.TestCase):
             # 只包含月日的日期格式
             # "07-11": (datetime(2021, 7, 11), datetime(2021, 7, 11, 23, 59, 59, 999999)), # 优先识别为 年-月
             # "07/11": (datetime(2021, 7, 11), datetime(2021, 7, 11, 23, 59, 59, 999999)), # 优先识别为 年/月
+            "12-31": (  # 31 不能作为月, 识别为 月-日
+                datetime(2021, 12, 31),
+                datetime(2021, 12, 31, 23, 59, 59, 999999),
+            ),
+            "7/23": (datetime(2021, 7, 23), datetime(2021, 7, 23, 23, 59, 59, 999999)),
             "07月11": (
                 datetime(2021, 7, 11),
                 datetime(2021, 7, 11, 23, 59, 59, 999999),
@@ -655,5 +717,1163 @@ class Cn2DateTest(unittest.TestCase):
                 assert r.microsecond == d.microsecond
 
 
+class DateTimeTest(unittest.TestCase):
+    def test_arithmetic(self):
+        d = DateTime(2020, 2, 29, 11, 23, 45, 6)
+        assert d.offset_year(1) == DateTime(2021, 2, 28, 11, 23, 45, 6)
+        assert d.offset_month(-3) == DateTime(2019, 11, 29, 11, 23, 45, 6)
+        assert d.offset_quarter(4) == DateTime(2021, 2, 28, 11, 23, 45, 6)
+        assert d.offset_week(1) == DateTime(2020, 3, 7, 11, 23, 45, 6)
+        assert d.offset_day(1) == DateTime(2020, 3, 1, 11, 23, 45, 6)
+        assert d.offset_hour(13) == DateTime(2020, 3, 1, 0, 23, 45, 6)
+        assert d.begin_of_week() == DateTime(2020, 2, 24)
+        assert d.end_of_week() == DateTime(2020, 3, 1, 23, 59, 59, 999999)
+        assert d.end_of_quarter() == DateTime(2020, 3, 31, 23, 59, 59, 999999)
+        assert d.end_of_month() == DateTime(2020, 2, 29, 23, 59, 59, 999999)
+
+    def test_immutable(self):
+        d = DateTime(2021, 9, 1)
+        assert d.tomorrow() == DateTime(2021, 9, 2)
+        assert d == DateTime(2021, 9, 1)
+        assert DateTime.of(d) is d
+        with self.assertRaises(AttributeError):
+            d.year = 2022
+        with self.assertRaises(ValueError):
+            DateTime(2021, 2, 30).offset_day(1)
+
+
+class DateBetweenTest(unittest.TestCase):
+    def test_value(self):
+        r = DateBetween(DateTime(2021, 9, 1), DateTime(2021, 9, 30, 23, 59, 59, 999999))
+        assert len(r) == 2
+        assert r[0] == r[-2] == DateTime(2021, 9, 1)
+        assert r[1] == DateTime(2021, 9, 30, 23, 59, 59, 999999)
+        begin, end = r
+        assert (begin, end) == (r.begin, r.end)
+        assert r.datetimes() == (
+            datetime(2021, 9, 1),
+            datetime(2021, 9, 30, 23, 59, 59, 999999),
+        )
+        assert r == DateBetween.of([r[0], r[1]])
+        assert len({r, DateBetween.of(r)}) == 1
+        assert pickle.loads(pickle.dumps(r)) == r
+        with self.assertRaises(IndexError):
+            r[2]
+        with self.assertRaises(AttributeError):
+            r.begin = DateTime(2021, 1, 1)
+
+    def test_invalid_date(self):
+        r = DateBetween(DateTime(2017, 2, 30), DateTime(2017, 2, 30, 23, 59, 59))
+        assert r[0] == DateTime(2017, 2, 30)
+        with self.assertRaises(ValueError):
+            r[0].datetime()
+
+
+class CalendarTableTest(unittest.TestCase):
+    def test_same_as_date(self):
+        table = CalendarTable(1999, 2001)
+        d = date(1998, 12, 1)
+        while d < date(2002, 2, 1):
+            ordinal = d.toordinal()
+            if 1999 <= d.year <= 2001:
+                assert table.ordinal(d.year, d.month, d.day) == ordinal
+            else:
+                assert table.ordinal(d.year, d.month, d.day) is None
+            assert table.from_ordinal(ordinal, 2000) == (d.year, d.month, d.day)
+            assert (
+                table.month_days(d.year, d.month)
+                == (
+                    (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+                    - timedelta(1)
+                ).day
+            )
+            d += timedelta(days=1)
+
+        assert table.ordinal(2000, 2, 30) is None
+        assert table.ordinal(2000, 13, 1) is None
+
+
+class AliasTableTest(unittest.TestCase):
+    @staticmethod
+    def _replace(s, alias_dict):
+        # 逐个别名调用 str.replace 的替换顺序
+        for k, alias in alias_dict.items():
+            for a in alias.split(","):
+                s = s.replace(a, k)
+        return s
+
+    def test_same_as_replace(self):
+        tables = [
+            conf.CN_ALIAS,
+            *(
+                {**conf.CN_ALIAS, **alias}
+                for alias in [
+                    conf.YEAR_ALIAS,
+                    conf.QUARTER_ALIAS,
+                    conf.MONTH_ALIAS,
+                    conf.WEEK_ALIAS,
+                    conf.DAY_ALIAS,
+                ]
+            ),
+        ]
+        first = ["", "今", "本", "当前", "这个", "这", "明", "昨", "去", "前"]
+        first += ["后", "上半", "下半", "上", "上个", "下", "下个"]
+        digits = ["", "3", "十", "两"]
+        units = ["年", "季度", "月", "周", "星期", "天", "日", "午"]
+        adverbs = ["", "以来", "以前", "以后", "之前", "之后", "前", "后"]
+        adverbs += ["内", "以内", "之内"]
+        items = [
+            f + d + g + u + a
+            for f in first
+            for d in digits
+            for g in ["", "个"]
+            for u in units
+            for a in adverbs
+        ]
+        # 别名字符任意组合的短字符串; 替换结果与前面的字符组成新的别名时 (例如“之以内”),
+        # 逐个替换会继续替换而一次扫描不会, 这类字符串不会由语法产生
+        chars = "上下两个之今以内前去周天季年度当日明星期本这"
+        items += [a + b + c for a in chars for b in chars for c in ["", *chars]]
+        items = [s for s in items if "之以" not in s]
+
+        for alias_dict in tables:
+            aliases = _AliasTable(alias_dict)
+            for s in items:
+                assert aliases.replace(s) == self._replace(s, alias_dict), s
+
+    def test_chained_alias(self):
+        aliases = _AliasTable({**conf.CN_ALIAS, **conf.YEAR_ALIAS})
+        assert aliases.replace("当前年") == "今年"
+        assert aliases.replace("这个年之内") == "今年内"
+        assert aliases.replace("上年") == "去年"
+
+
+class PlanTest(unittest.TestCase):
+    def test_compile(self):
+        plan = compile("前三个月")
+        assert plan == RelativePlan("month", "month", -3, 3)
+        assert plan.direction == -1
+        assert compile("下半年") == RelativePlan("month", "year", 6, 6)
+        assert compile("两天后").direction == 1
+        assert compile("两周内").direction == 0
+        assert compile("17年7月") == DatePlan(17, 7, None)
+        assert compile("后年") is None
+        assert compile("hello") is None
+
+    def test_evaluate(self):
+        plan = compile("前三个月")
+        for now, begin, end in [
+            (datetime(2021, 1, 1), datetime(2020, 10, 1), datetime(2020, 12, 31)),
+            (datetime(2021, 3, 31), datetime(2020, 12, 1), datetime(2021, 2, 28)),
+        ]:
+            result = plan.evaluate(now)
+            assert result[0].datetime() == begin
+            assert result[1].datetime() == end.replace(
+                hour=23, minute=59, second=59, microsecond=999999
+            )
+
+    def test_parse_with_now(self):
+        now = datetime(2020, 2, 29, 15)
+        assert parse("今年", now=now)[0].datetime() == datetime(2020, 1, 1)
+        assert parse("明年", now=now)[0].datetime() == datetime(2021, 1, 1)
+        assert parse("下午", now=now)[0].datetime() == datetime(2020, 2, 29, 12)
+        assert parse("7日", now=now)[0].datetime() == datetime(2020, 2, 7)
+        assert parse("7月", now=now)[0].datetime() == datetime(2020, 7, 1)
+
+
+class ParseManyTest(unittest.TestCase):
+    def test_parse_many(self):
+        now = datetime(2021, 9, 1, 11)
+        items = ["今年", "2017-7-23", "今年", "hello", "本年", "七月", "下午"]
+        results = parse_many(iter(items), now=now)
+        assert len(results) == len(items)
+        for s, r in zip(items, results):
+            expected = parse(s, now=now)
+            if expected is None:
+                assert r is None
+            else:
+                assert [d.datetime() for d in r] == [d.datetime() for d in expected]
+
+        # 重复的结果相等, 日期范围是不可变对象, 可以共享
+        assert results[0] == results[2] == results[4]
+
+
+class ParseStreamTest(unittest.TestCase):
+    def test_parse_stream(self):
+        now = datetime(2021, 9, 1, 11)
+        lines = ["今年\n", "2017-7-23\r\n", "hello\n", "今年\n", "七月"]
+        for cache_size in [0, 1, 1024]:
+            results = list(parse_stream(iter(lines), now=now, cache_size=cache_size))
+            assert [s for s, _ in results] == [
+                "今年",
+                "2017-7-23",
+                "hello",
+                "今年",
+                "七月",
+            ]
+            for s, r in results:
+                expected = parse(s, now=now)
+                if expected is None:
+                    assert r is None
+                else:
+                    assert [d.datetime() for d in r] == [d.datetime() for d in expected]
+            assert results[0][1] == results[3][1]
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "dates.txt")
+            with open(filepath, "w", encoding="utf8") as f:
+                f.write("2023年\n上个月\n")
+            with open(filepath, encoding="utf8") as f:
+                results = list(parse_stream(f, now=datetime(2021, 9, 1)))
+        assert [s for s, _ in results] == ["2023年", "上个月"]
+        assert [d.datetime() for d in results[1][1]] == [
+            datetime(2021, 8, 1),
+            datetime(2021, 8, 31, 23, 59, 59, 999999),
+        ]
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import cn2an
+except ImportError:
+    cn2an = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class ParseArrayTest(unittest.TestCase):
+    def test_parse_array(self):
+        now = datetime(2021, 9, 1, 11)
+        items = ["今年", "2017-7-23", "hello", "今年", "2017-2-30"]
+        begin, end = parse_array(iter(items), now=now)
+        assert begin.dtype == end.dtype == numpy.dtype("datetime64[us]")
+        assert begin[0] == begin[3] == numpy.datetime64("2021-01-01T00:00:00")
+        assert end[0] == numpy.datetime64("2021-12-31T23:59:59.999999")
+        assert begin[1] == numpy.datetime64("2017-07-23T00:00:00")
+        assert numpy.isnat(begin[2]) and numpy.isnat(end[2])
+        assert numpy.isnat(begin[4])
+
+    def test_out(self):
+        out = (
+            numpy.empty(2, dtype="datetime64[us]"),
+            numpy.empty(2, dtype="datetime64[us]"),
+        )
+        begin, end = parse_array(["2023年", "hello"], out=out)
+        assert begin is out[0] and end is out[1]
+        assert begin[0] == numpy.datetime64("2023-01-01")
+        with self.assertRaises(ValueError):
+            parse_array(["2023年"], out=out)
+
+
+@unittest.skipIf(pandas is None, "pandas is not installed")
+class ParseSeriesTest(unittest.TestCase):
+    def test_parse_series(self):
+        now = datetime(2021, 9, 1, 11)
+        series = pandas.Series(
+            ["今年", None, "hello", "今年", "上个月"], index=list("abcde")
+        )
+        df = parse_series(series, now=now)
+        assert list(df.index) == list("abcde")
+        assert df["begin"].dtype == numpy.dtype("datetime64[us]")
+        assert df["begin"]["a"] == df["begin"]["d"] == pandas.Timestamp(2021, 1, 1)
+        assert df["end"]["e"] == pandas.Timestamp("2021-08-31 23:59:59.999999")
+        assert df["begin"].isna().tolist() == [False, True, True, False, False]
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class ParseArrowTest(unittest.TestCase):
+    def test_parse_arrow(self):
+        now = datetime(2021, 9, 1, 11)
+        array = pyarrow.chunked_array([["今年", None], ["hello", "今年", "上个月"]])
+        table = parse_arrow(array, now=now)
+        assert table.column("begin").type == pyarrow.timestamp("us")
+        assert table.column("begin").to_pylist() == [
+            datetime(2021, 1, 1),
+            None,
+            None,
+            datetime(2021, 1, 1),
+            datetime(2021, 8, 1),
+        ]
+        assert table.column("end").to_pylist()[4] == datetime(
+            2021, 8, 31, 23, 59, 59, 999999
+        )
+
+
+class ParseParallelTest(unittest.TestCase):
+    def test_parse_parallel(self):
+        now = datetime(2021, 9, 1, 11)
+        items = ["今年", "2017-7-23", "hello", "七月", "下午", "前两天", "17年"] * 5
+        results = list(parse_parallel(iter(items), now=now, workers=2, chunksize=3))
+        expected = parse_many(items, now=now)
+        assert len(results) == len(items)
+        for r, e in zip(results, expected):
+            if e is None:
+                assert r is None
+            else:
+                assert [d.datetime() for d in r] == [d.datetime() for d in e]
+
+    def test_warm_up(self):
+        with mock.patch.dict(cn2date_module._dict, clear=True):
+            _warm_up()
+            assert set(cn2date_module._dict) == {NORM_DATE, CHINE_DATE}
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            list(parse_parallel(["今年"], workers=0))
+        with self.assertRaises(ValueError):
+            list(parse_parallel(["今年"], chunksize=0))
+
+
+class AsyncParseTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = datetime(2021, 9, 1, 11)
+        self.items = ["今年", "2017-7-23", "hello", "今年", "上个月", "前两天"] * 3
+
+    def _expected(self):
+        return [
+            None if r is None else r.datetimes()
+            for r in parse_many(self.items, now=self.now)
+        ]
+
+    def test_aparse(self):
+        async def main():
+            return await asyncio.gather(*(aparse(s, self.now) for s in self.items))
+
+        results = asyncio.run(main())
+        assert [None if r is None else r.datetimes() for r in results] == (
+            self._expected()
+        )
+
+    def test_batch(self):
+        calls = []
+
+        def parse_batch(items, now):
+            calls.append(items)
+            return parse_many(items, now)
+
+        async def main(max_batch):
+            parser = AsyncParser(window=0.05, max_batch=max_batch)
+            return await asyncio.gather(
+                *(parser.parse(s, self.now) for s in self.items)
+            )
+
+        with mock.patch("cn2date.aio._parse_batch", parse_batch):
+            results = asyncio.run(main(256))
+            # 时间窗口内的请求合并为一批, 相同的字符串只解析一次
+            assert [len(items) for items in calls] == [5]
+            assert [None if r is None else r.datetimes() for r in results] == (
+                self._expected()
+            )
+
+            calls.clear()
+            results = asyncio.run(main(3))
+            assert [len(items) for items in calls] == [3] * 6
+            assert [None if r is None else r.datetimes() for r in results] == (
+                self._expected()
+            )
+
+    def test_error_and_cancel(self):
+        async def main():
+            parser = AsyncParser(window=0.01)
+            bad = asyncio.ensure_future(parser.parse("十季度"))
+            cancelled = asyncio.ensure_future(parser.parse("今年", self.now))
+            good = asyncio.ensure_future(parser.parse("今年", self.now))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            with self.assertRaises(Exception):
+                await bad
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            return await good
+
+        r = asyncio.run(main())
+        assert r.datetimes() == (
+            datetime(2021, 1, 1),
+            datetime(2021, 12, 31, 23, 59, 59, 999999),
+        )
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            AsyncParser(window=-1)
+        with self.assertRaises(ValueError):
+            AsyncParser(max_batch=0)
+
+
+class ExtractTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = datetime(2021, 9, 1, 11)
+
+    def _extract(self, text):
+        return [(text[i:j], r.datetimes()) for i, j, r in extract(text, self.now)]
+
+    def test_extract(self):
+        text = "请把去年三月和本季度的报表发我"
+        assert [(i, j) for i, j, _ in extract(text, self.now)] == [
+            (2, 4),
+            (4, 6),
+            (7, 10),
+        ]
+        assert self._extract(text)[2] == (
+            "本季度",
+            (datetime(2021, 7, 1), datetime(2021, 9, 30, 23, 59, 59, 999999)),
+        )
+
+        text = "今天是2021年9月1日, 上个月23号到账, 订单2017-7-23发货, 第三季度 前两天"
+        assert [s for s, _ in self._extract(text)] == [
+            "今天",
+            "2021年9月1日",
+            "上个月",
+            "23号",
+            "2017-7-23",
+            "第三季度",
+            "前两天",
+        ]
+        for s, r in self._extract(text):
+            assert r == parse(s, self.now).datetimes(), s
+
+    def test_not_mention(self):
+        assert self._extract("") == []
+        assert self._extract("hello world") == []
+        # 不包含单位的数字、从数字中间开始的片段不是日期
+        assert self._extract("我有3个苹果和1/2杯水, 3-5个工作日, 12345年") == []
+
+    def test_trigger_index(self):
+        index = _TriggerIndex(["星期", "期", "季度", "年"])
+        assert list(index.finditer("上星期年季度")) == [
+            (1, 3),
+            (2, 3),
+            (3, 4),
+            (4, 6),
+        ]
+
+
+class FastPathTest(unittest.TestCase):
+    def test_same_as_grammar(self):
+        lark = _load_parser(NORM_DATE_GRAMMAR_FILE)
+        numbers = ["0", "7", "00", "07", "12", "13", "23", "31", "32", "99", "2017"]
+        numbers += ["0123", "123", "20177"]
+        delimiters = ["", "年", "月", "日", "号", "-", "/"]
+        items = [a + d for a in numbers for d in delimiters]
+        items += [s + b + d for s in items for b in numbers for d in delimiters]
+        items += ["2017-7-23", "2017/07/23号", "2017年7月23日", "17-7-23-", "7-23-1"]
+
+        for s in items:
+            plan = compile_fast(s)
+            if plan is not None:
+                expected = compile_plan(s, lark=lark, transformer=NormDateTransformer())
+                assert plan == expected, s
+
+    def test_fast_path(self):
+        assert compile_fast("2017-7-23") == DatePlan(2017, 7, 23)
+        assert compile_fast("2017年7月") == DatePlan(2017, 7, None)
+        assert compile_fast("07-11") == DatePlan(7, 11, None)
+        assert compile_fast("12-31") == DatePlan(None, 12, 31)
+        assert compile_fast("7号") == DatePlan(None, None, 7)
+
+    def test_fallback(self):
+        assert compile_fast("二零一七年七月") is None
+        assert compile_fast("2017年七月") is None
+        assert compile_fast("１２月") is None
+        assert compile("2017年七月") == DatePlan(2017, 7, None)
+
+
+class NumeralTest(unittest.TestCase):
+    def test_to_arabic(self):
+        assert to_arabic("二零一七") == "2017"
+        assert to_arabic("二十三日") == "23日"
+        assert to_arabic("十一月") == "11月"
+        assert to_arabic("廿三") == "23"
+        assert to_arabic("前两年") == "前2年"
+        assert to_arabic("下半年") == "下0.5年"
+        assert to_arabic("上半十年前") == "上5年前"
+        assert to_arabic("今天") == "今天"
+
+    @unittest.skipIf(cn2an is None, "cn2an is not installed")
+    def test_same_as_cn2an(self):
+        chars = "0123456789零一二三四五六七八九十"
+        items = [a + b + c for a in chars for b in ["", *chars] for c in ["", *chars]]
+        items += ["二零一七", "二〇一七", "二十三", "廿三", "三十一", "十二", "一十二"]
+        first = ["", "今", "这个", "前", "后", "上半", "下半", "上个", "下"]
+        digits = ["", "一", "十", "两", "半", "3"]
+        units = ["年", "季度", "月", "周", "星期", "天", "日", "午"]
+        adverbs = ["", "以来", "之后", "前", "后", "内"]
+        for f in first:
+            for d in digits:
+                for u in units:
+                    items.extend(f + d + g + u + a for g in ["", "个"] for a in adverbs)
+
+        for s in items:
+            assert to_arabic(s) == cn2an.transform(s), s
+
+
+# 语法文件中的字符串、正则表达式、名称以及 EBNF 运算符
+_GRAMMAR_TOKEN = re.compile(
+    r'"(?:\\.|[^"\\])*"i?|/(?:\\.|[^/\\])*/[imslux]*|[A-Za-z_][A-Za-z_0-9]*|[()|?*+]'
+)
+
+
+def _grammar_pattern(filepath: str) -> Tuple[str, str]:
+    """将语法文件中的规则与终结符展开为正则表达式
+
+    语法中没有递归的规则, 展开后的正则表达式接受的字符串包含语法可以识别的全部字符串
+    (词法分析与前瞻断言只会拒绝更多的字符串), 被忽略的字符不展开到规则中
+
+    Args:
+        filepath (str): 语法文件路径
+
+    Returns:
+        Tuple[str, str]: 开始规则以及被忽略的字符对应的正则表达式
+    """
+    with open(filepath, encoding="utf8") as f:
+        lines = [line for line in f if not line.lstrip().startswith(("#", "//"))]
+
+    # 定义从不以空白开头的行开始, 以空白开头的行为上一个定义的续行
+    definitions: Dict[str, str] = {}
+    ignores: List[str] = []
+    name = None
+    for line in lines:
+        if not line.strip():
+            continue
+        if line[:1].isspace():
+            if name is not None:
+                definitions[name] += f" {line.strip()}"
+            continue
+        name = None
+        if line.startswith("%ignore"):
+            ignores.append(line[len("%ignore") :].strip())
+            continue
+        if ":" in line:
+            name, body = line.split(":", 1)
+            # 去掉规则的优先级, 例如 “year_month_day.6”
+            name = name.strip().split(".", 1)[0]
+            definitions[name] = body.strip()
+
+    def expand(body: str, stack: Tuple[str, ...]) -> str:
+        pattern = []
+        for token in _GRAMMAR_TOKEN.findall(body):
+            if token.startswith('"'):
+                literal = re.sub(r"\\(.)", r"\1", token.rstrip("i")[1:-1])
+                pattern.append(re.escape(literal))
+            elif token.startswith("/"):
+                pattern.append(f"(?:{token[1 : token.rindex('/')]})")
+            elif token == "(":
+                pattern.append("(?:")
+            elif token in ")|?*+":
+                pattern.append(token)
+            elif token in stack:
+                raise ValueError(f"recursive definition {token!r} in {filepath}")
+            else:
+                pattern.append(f"(?:{expand(definitions[token], (*stack, token))})")
+        return "".join(pattern)
+
+    return expand(definitions["start"], ("start",)), expand(" | ".join(ignores), ())
+
+
+def _load_prefilter(filepath: str) -> _Prefilter:
+    """由语法文件展开的正则表达式得出字符集合与长度范围, 不会拒绝任何可以识别的字符串
+
+    Args:
+        filepath (str): 语法文件路径
+
+    Returns:
+        _Prefilter: 字符集合与长度范围
+    """
+    start_pattern, ignore_pattern = _grammar_pattern(filepath)
+    start = sre_parse.parse(start_pattern)
+    ignore = _chars(sre_parse.parse(ignore_pattern), filepath)
+    lo, hi = start.getwidth()
+    return _Prefilter(
+        frozenset(_chars(start, filepath) | ignore), frozenset(ignore), lo, hi
+    )
+
+
+def _chars(items, filepath: str) -> Set[str]:
+    # 正则表达式解析树中所有可能被匹配的字符, 断言不消耗字符, 不计算在内
+    chars: Set[str] = set()
+    for op, av in items:
+        if op.name == "LITERAL":
+            chars.add(chr(av))
+        elif op.name == "IN":
+            for op_, av_ in av:
+                if op_.name == "LITERAL":
+                    chars.add(chr(av_))
+                elif op_.name == "RANGE":
+                    chars.update(chr(c) for c in range(av_[0], av_[1] + 1))
+                else:
+                    raise ValueError(f"unbounded character set in {filepath}")
+        elif op.name == "BRANCH":
+            for branch in av[1]:
+                chars |= _chars(branch, filepath)
+        elif op.name in ("SUBPATTERN", "MAX_REPEAT", "MIN_REPEAT"):
+            chars |= _chars(av[-1], filepath)
+        elif op.name not in ("ASSERT", "ASSERT_NOT", "AT"):
+            raise ValueError(f"unbounded character set in {filepath}")
+    return chars
+
+
+class RouterTest(unittest.TestCase):
+    def test_route(self):
+        assert route("2017-7-23") == (NORM_DATE,)
+        assert route("2017年") == (NORM_DATE, CHINE_DATE)
+        assert route("前两天") == (CHINE_DATE,)
+        assert route("下个星期") == (CHINE_DATE,)
+        assert route("hello") == ()
+        assert route("") == ()
+
+    def test_no_false_reject(self):
+        first = [
+            "",
+            "今",
+            "本",
+            "当前",
+            "这个",
+            "这",
+            "明",
+            "昨",
+            "去",
+            "前",
+            "上半",
+            "下个",
+        ]
+        digits = ["", "1", "12", "两", "三", "十二"]
+        units = ["年", "季度", "月", "周", "星期", "天", "日", "午", "年份", "月份"]
+        adverbs = ["", "以来", "以前", "之后", "前", "后", "内", "以内"]
+        items = ["2017-7-23", "17/7", "二零一七年七月二十三号", "十一", "7", "23日"]
+        for f in first:
+            for d in digits:
+                for u in units:
+                    items.extend(f + d + u + a for a in adverbs)
+
+        for s in items:
+            if route(s):
+                continue
+            try:
+                plan = _norm_date_compile(s) or _chine_date_compile(s)
+            except Exception:
+                plan = None
+            assert plan is None, s
+
+    def test_prefilter(self):
+        assert (_NORM_DATE_FILTER.min_len, _NORM_DATE_FILTER.max_len) == (1, 12)
+        assert (_CHINE_DATE_FILTER.min_len, _CHINE_DATE_FILTER.max_len) == (2, 8)
+        assert _CHINE_DATE_FILTER.ignore == frozenset(" 份度第")
+        # 超过最长的日期的数字串不经过语法解析
+        assert route("2017072300000") == ()
+        assert route("二零一七年十二月三十一日") == (NORM_DATE,)
+        # 被忽略的字符不计算长度
+        assert route("第 三 个 季度 以 内") == (CHINE_DATE,)
+        assert route("上半十个星期以内") == (CHINE_DATE,)
+        assert route("上半十个星期以内内") == ()
+
+    def test_prefilter_derived(self):
+        # 预先计算的字符集合与长度范围与由语法文件推导出的结果一致
+        for filepath, prefilter in [
+            (NORM_DATE_GRAMMAR_FILE, _NORM_DATE_FILTER),
+            (CHINE_DATE_GRAMMAR_FILE, _CHINE_DATE_FILTER),
+        ]:
+            assert _load_prefilter(filepath) == prefilter, filepath
+
+    def test_prefilter_property(self):
+        # 由语法展开的正则表达式随机生成句子, 以及随机插入、删除、替换字符或者插入被忽略的字符的变体,
+        # 加上长度不超过 2 的全部字符串, 语法可以识别的字符串都不能被路由排除
+        rng = random.Random(0)
+        grammars = [
+            (NORM_DATE, NORM_DATE_GRAMMAR_FILE, _NORM_DATE_FILTER),
+            (CHINE_DATE, CHINE_DATE_GRAMMAR_FILE, _CHINE_DATE_FILTER),
+        ]
+        alphabet = [*sorted(_NORM_DATE_FILTER.chars | _CHINE_DATE_FILTER.chars), "x"]
+        items = ["", *alphabet, *(a + b for a in alphabet for b in alphabet)]
+        for _, filepath, _ in grammars:
+            pattern, ignore_pattern = _grammar_pattern(filepath)
+            start = sre_parse.parse(pattern)
+            ignore = sre_parse.parse(ignore_pattern) if ignore_pattern else None
+            for _ in range(1000):
+                s = self._sample(start, rng)
+                longest = self._sample(start, rng, longest=True)
+                items.extend([s, longest])
+
+                t = s
+                for _ in range(rng.randint(1, 3)):
+                    i = rng.randint(0, len(t))
+                    c = rng.choice(alphabet)
+                    op = rng.choice(["insert", "delete", "replace"])
+                    if op == "insert":
+                        t = t[:i] + c + t[i:]
+                    elif op == "delete":
+                        t = t[:i] + t[i + 1 :]
+                    else:
+                        t = t[:i] + c + t[i + 1 :]
+                items.append(t)
+
+                # 被忽略的字符可以出现在记号之间, 使字符串超过记号的总长度
+                for _ in range(0 if ignore is None else rng.randint(1, 6)):
+                    i = rng.randint(0, len(longest))
+                    longest = longest[:i] + self._sample(ignore, rng) + longest[i:]
+                items.append(longest)
+
+        for name, filepath, prefilter in grammars:
+            lark = _parser(name, filepath)
+            lengths = set()
+            for s in items:
+                try:
+                    lark.parse(s)
+                except Exception:
+                    continue
+                assert name in route(s), (name, s)
+                lengths.add(len([c for c in s if c not in prefilter.ignore]))
+            # 生成的字符串覆盖了长度范围的两端, 长度范围没有多余的余量
+            assert min(lengths) <= prefilter.min_len, (name, min(lengths))
+            assert max(lengths) >= prefilter.max_len, (name, max(lengths))
+
+    def _sample(self, items, rng: random.Random, longest: bool = False) -> str:
+        # longest 为 True 时只选择最长的分支与最多的重复次数
+        out = []
+        for op, av in items:
+            if op.name == "LITERAL":
+                out.append(chr(av))
+            elif op.name == "IN":
+                op_, av_ = rng.choice(av)
+                out.append(chr(av_ if op_.name == "LITERAL" else rng.randint(*av_)))
+            elif op.name == "BRANCH":
+                branches = av[1]
+                if longest:
+                    width = max(b.getwidth()[1] for b in branches)
+                    branches = [b for b in branches if b.getwidth()[1] == width]
+                out.append(self._sample(rng.choice(branches), rng, longest))
+            elif op.name == "SUBPATTERN":
+                out.append(self._sample(av[-1], rng, longest))
+            elif op.name in ("MAX_REPEAT", "MIN_REPEAT"):
+                n = min(av[1], av[0] + 2)
+                n = n if longest else rng.randint(av[0], n)
+                out.extend(self._sample(av[2], rng, longest) for _ in range(n))
+        return "".join(out)
+
+
+class ThreadSafetyTest(unittest.TestCase):
+    threads = 16
+
+    def setUp(self) -> None:
+        # 缩短线程切换间隔, 增加交错执行的机会
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        self.addCleanup(set_cache_size, conf.PARSE_CACHE_SIZE)
+
+        now = datetime(2021, 9, 1, 11)
+        self.now = now
+        self.items = [
+            "2017-7-23",
+            "二零一七年七月二十三日",
+            "17年",
+            "七月",
+            "今年",
+            "前两年",
+            "上半年",
+            "后2个季度",
+            "下个月",
+            "3周前",
+            "前两天",
+            "下午",
+            "hello",
+        ]
+        self.expected = [
+            None if r is None else tuple(d.datetime() for d in r)
+            for r in parse_many(self.items, now=now)
+        ]
+
+    def _run(self, func):
+        barrier = threading.Barrier(self.threads)
+
+        def worker(i):
+            barrier.wait()
+            out = []
+            for j in range(200):
+                k = (i + j) % len(self.items)
+                r = func(self.items[k])
+                out.append((k, None if r is None else tuple(d.datetime() for d in r)))
+            return out
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            results = list(executor.map(worker, range(self.threads)))
+        for out in results:
+            for k, r in out:
+                assert r == self.expected[k], self.items[k]
+
+    def test_parser_built_once(self):
+        load_parser = mock.Mock(wraps=_load_parser)
+        with (
+            mock.patch.dict(cn2date_module._dict, clear=True),
+            mock.patch.object(cn2date_module, "_load_parser", load_parser),
+        ):
+            set_cache_size(0)
+            self._run(lambda s: parse(s, now=self.now))
+        assert load_parser.call_count == 2
+
+    def test_shared_cache(self):
+        # 容量小于样本数, 同时触发命中、淘汰与写入
+        set_cache_size(4)
+        self._run(lambda s: parse(s, now=self.now))
+        info = cache_info()
+        assert info.hits + info.misses == self.threads * 200
+        assert info.currsize <= 4
+
+    def test_set_cache_size(self):
+        stop = threading.Event()
+
+        def toggle():
+            while not stop.is_set():
+                set_cache_size(0)
+                set_cache_size(2)
+
+        def parse_with_info(s):
+            cache_info()
+            return parse_many([s, "hello"], now=self.now)[0]
+
+        t = threading.Thread(target=toggle)
+        t.start()
+        try:
+            self._run(lambda s: parse(s, now=self.now))
+            self._run(parse_with_info)
+        finally:
+            stop.set()
+            t.join()
+
+
+class BenchTest(unittest.TestCase):
+    def test_corpora(self):
+        # 每个样本都经过对应的语法
+        for name, items in NORM_CORPORA.items():
+            for s in items:
+                assert isinstance(compile(s), DatePlan), (name, s)
+        for name, items in chine_corpora().items():
+            for s in items:
+                assert isinstance(compile(s), RelativePlan), (name, s)
+        for s in REJECT_CORPUS:
+            assert compile(s) is None, s
+
+    def test_compare(self):
+        baseline = {
+            "startup": {"cold": 10.0},
+            "corpora": {"norm_full": {"throughput": 1000.0, "p99": 20.0}},
+            "router": {"wasted": 1.0},
+        }
+        current = {
+            "startup": {"cold": 10.5},
+            "corpora": {"norm_full": {"throughput": 800.0, "p99": 30.0}},
+            "router": {"wasted": 5.0},
+            "extract": {"810": 1.0},
+        }
+        names = [r[0] for r in compare(baseline, current, threshold=0.1)]
+        assert names == ["corpora.norm_full.throughput", "corpora.norm_full.p99"]
+
+
+class ImportTimeTest(unittest.TestCase):
+    def _imported(self, code: str) -> set:
+        # -X importtime 在标准错误中为每个 import 语句导入的模块输出一行, 最后一列为模块名,
+        # importlib.import_module 导入的模块不会输出, 因此同时检查 sys.modules
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                f"{code}\nimport sys\nprint('\\n'.join(sys.modules))",
+            ],
+            cwd=root,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        modules = set(out.stdout.split())
+        modules.update(
+            line.rsplit("|", 1)[-1].strip()
+            for line in out.stderr.splitlines()
+            if line.startswith("import time:")
+        )
+        return modules
+
+    def test_import_package(self):
+        modules = self._imported("import cn2date")
+        heavy = {
+            "lark",
+            "cn2an",
+            "numpy",
+            "concurrent.futures",
+            "cn2date.cn2date",
+            "cn2date.transform",
+        }
+        assert not modules & heavy, modules & heavy
+
+    def test_lazy_attributes(self):
+        modules = self._imported("import cn2date; cn2date.parse('2017-7-23')")
+        assert "cn2date.cn2date" in modules
+        # 阿拉伯数字日期经过快速路径, 不需要加载语法解析器
+        assert "cn2date.transform" not in modules and "lark" not in modules
+
+        import cn2date
+        import cn2date.runtime
+
+        assert cn2date.parse is parse
+        assert set(cn2date.__all__) <= set(dir(cn2date))
+        # 模块中不能定义与 dir() 钩子同名的变量, freezegun 等工具会对模块调用 dir()
+        assert "parse" in dir(cn2date.cn2date) and "Lark" in dir(cn2date.runtime)
+        with self.assertRaises(AttributeError):
+            cn2date.missing
+
+
+class ParseCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        set_cache_size(2)
+        self.addCleanup(set_cache_size, conf.PARSE_CACHE_SIZE)
+
+    def test_hit_and_evict(self):
+        parse("2023年")
+        parse("2023年")
+        assert parse("hello") is None
+        assert parse("hello") is None
+        parse("2017-7-23")
+        info = cache_info()
+        assert (info.hits, info.misses, info.evictions) == (2, 3, 1)
+        assert info.currsize == 2
+
+    def test_invalidate(self):
+        r = parse("今天", now=datetime(2021, 9, 1, 8))
+        assert r[0].datetime() == datetime(2021, 9, 1)
+        # 缓存的结果不可修改
+        with self.assertRaises(AttributeError):
+            r[0].year = 2000
+
+        r = parse("今天", now=datetime(2021, 9, 1, 23))
+        assert r[0].datetime() == datetime(2021, 9, 1)
+        assert cache_info().hits == 1
+
+        r = parse("今天", now=datetime(2021, 9, 2, 1))
+        assert r[0].datetime() == datetime(2021, 9, 2)
+        assert cache_info().invalidations == 1
+
+        # 只包含月份的日期依赖参考时间所在的年份
+        parse("7月", now=datetime(2021, 1, 1))
+        assert parse("7月", now=datetime(2022, 1, 1))[0].year == 2022
+        assert cache_info().invalidations == 2
+
+
+class InstrumentTest(unittest.TestCase):
+    def setUp(self) -> None:
+        set_cache_size(0)
+        self.addCleanup(set_cache_size, conf.PARSE_CACHE_SIZE)
+
+    def test_disabled(self):
+        metrics = Metrics()
+        set_metrics(metrics)
+        set_metrics(None)
+        parse("2017-7-23")
+        assert metrics.snapshot() == {"stages": {}, "counters": {}}
+
+    def test_snapshot(self):
+        with instrument() as metrics:
+            parse("2017-7-23")
+            parse("二零一七年十二月")
+            parse("上周")
+            parse("2017年前")
+            parse("hello")
+            with self.assertRaises(Exception):
+                parse("十季度")
+        parse("今年")
+
+        snapshot = metrics.snapshot()
+        assert snapshot["counters"] == {
+            "errors": 1,
+            "handled": {
+                "chine_date/weeks": 1,
+                "norm_date/year_month": 1,
+                "norm_date/year_month_day": 1,
+            },
+            "inputs": 6,
+            "parse_errors": {"chine_date": 1},
+            "rejections": {"grammar": 1, "router": 1},
+        }
+        stages = snapshot["stages"]
+        assert stages["route"]["count"] == 6
+        assert stages["norm_date.fast_path"]["count"] == 2
+        assert stages["norm_date.parse"]["count"] == 1
+        assert stages["chine_date.transform_error"]["count"] == 1
+        assert stages["evaluate"]["count"] == 3
+        assert all(s["seconds"] >= 0 for s in stages.values())
+
+    def test_callback(self):
+        events = []
+        with instrument(events.append):
+            parse_many(["2017-7-23", "上周", "2017-7-23", "hello"])
+
+        assert [(e.text, e.grammar, e.rule) for e in events] == [
+            ("2017-7-23", "norm_date", "year_month_day"),
+            ("上周", "chine_date", "weeks"),
+            ("hello", None, None),
+        ]
+        assert list(events[0].stages) == ["route", "norm_date.fast_path"]
+        assert list(events[1].stages) == [
+            "route",
+            "chine_date.parse",
+            "chine_date.transform",
+        ]
+        assert not any(e.fallback or e.error for e in events)
+
+    def test_fallback(self):
+        metrics = Metrics()
+        trace = Trace("十二月")
+        trace.grammar, trace.rule = CHINE_DATE, "months"
+        metrics.record(
+            trace, (NORM_DATE, CHINE_DATE), RelativePlan("month", "year", 11, 1)
+        )
+        assert metrics.snapshot()["counters"]["fallbacks"] == 1
+
+    def test_prometheus(self):
+        with instrument() as metrics:
+            parse("2017-7-23")
+            parse("hello")
+
+        text = metrics.prometheus()
+        assert text.endswith("\n")
+        lines = text.splitlines()
+        assert "# TYPE cn2date_stage_seconds summary" in lines
+        assert 'cn2date_stage_seconds_count{stage="route"} 2' in lines
+        assert (
+            'cn2date_handled_total{grammar="norm_date",rule="year_month_day"} 1'
+            in lines
+        )
+        assert "cn2date_inputs_total 2" in lines
+        assert 'cn2date_rejections_total{reason="router"} 1' in lines
+
+        metrics.reset()
+        assert metrics.prometheus() == "# TYPE cn2date_stage_seconds summary\n"
+
+
+class GrammarCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.options = conf.PARSER_OPTIONS
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_cache_file(self):
+        d = self.cache_dir.name
+        with mock.patch.object(conf, "CACHE_DIR", d):
+            _l(NORM_DATE_GRAMMAR_FILE, **self.options)
+            files = os.listdir(d)
+            assert len(files) == 1 and files[0].startswith("norm_date_")
+
+            # 再次加载时从缓存文件读取
+            lark = _l(NORM_DATE_GRAMMAR_FILE, **self.options)
+            assert lark.parse("2017-7-23") is not None
+            assert os.listdir(d) == files
+
+            # 选项变化时使用新的缓存文件
+            _l(NORM_DATE_GRAMMAR_FILE, **{**self.options, "propagate_positions": True})
+            assert len(os.listdir(d)) == 2
+
+    def test_broken_cache_file(self):
+        d = self.cache_dir.name
+        with mock.patch.object(conf, "CACHE_DIR", d):
+            _l(NORM_DATE_GRAMMAR_FILE, **self.options)
+            with open(os.path.join(d, os.listdir(d)[0]), "wb") as f:
+                f.write(b"broken")
+
+            lark = _l(NORM_DATE_GRAMMAR_FILE, **self.options)
+            assert lark.parse("2017-7-23") is not None
+
+    def test_unavailable_cache_dir(self):
+        # 缓存目录的位置被普通文件占用, 无法创建
+        blocker = os.path.join(self.cache_dir.name, "file")
+        open(blocker, "w").close()
+        with mock.patch.object(conf, "CACHE_DIR", os.path.join(blocker, "cn2date")):
+            lark = _l(NORM_DATE_GRAMMAR_FILE, **self.options)
+            assert lark.parse("2017-7-23") is not None
+
+
+_SETUP_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "setup.py"
+)
+
+
+@unittest.skipUnless(os.path.exists(_SETUP_FILE), "setup.py is not available")
+class StandaloneTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.setup = runpy.run_path(_SETUP_FILE)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.out_file = os.path.join(cls.tmp.name, "standalone.py")
+        cls.setup["gen_standalone"](cls.out_file)
+
+        spec = util.spec_from_file_location("cn2date.standalone", cls.out_file)
+        cls.module = util.module_from_spec(spec)
+        spec.loader.exec_module(cls.module)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def test_same_trees(self):
+        chine = [s for items in chine_corpora().values() for s in items]
+        norm = [s for items in NORM_CORPORA.values() for s in items]
+        for name, filepath, items in [
+            ("norm_date", NORM_DATE_GRAMMAR_FILE, [*norm, *REJECT_CORPUS]),
+            ("chine_date", CHINE_DATE_GRAMMAR_FILE, [*chine, *REJECT_CORPUS]),
+        ]:
+            expected = _l(filepath, **conf.PARSER_OPTIONS)
+            parser = getattr(self.module, f"{name}_parser")()
+            for s in items:
+                assert self._parse(parser, s) == self._parse(expected, s), (name, s)
+
+    def _parse(self, parser, s: str) -> str:
+        # 两个运行时的解析树与异常类型不同, 比较解析树的文本表示
+        try:
+            return repr(parser.parse(s))
+        except Exception as e:
+            return type(e).__name__
+
+    def test_load_standalone(self):
+        with mock.patch.dict(sys.modules, {"cn2date.standalone": self.module}):
+            assert runtime._load_standalone() is self.module
+
+            # 语法文件与生成时不一致
+            digests = {**self.module.GRAMMAR_DIGESTS, "norm_date": "0" * 64}
+            with mock.patch.object(self.module, "GRAMMAR_DIGESTS", digests):
+                assert runtime._load_standalone() is None
+
+    def test_unknown_lark_output(self):
+        # lark 的 standalone 输出中找不到运行时的结束位置时跳过生成, 不中断构建
+        out_file = os.path.join(self.tmp.name, "unknown.py")
+        with mock.patch(
+            "lark.tools.standalone.gen_standalone",
+            lambda lark, output: output("class Lark: pass"),
+        ):
+            with self.assertRaises(ValueError):
+                self.setup["gen_standalone"](out_file)
+
+            command = self.setup["BuildPy"](Distribution())
+            command.build_lib = self.tmp.name
+            with (
+                mock.patch.object(self.setup["build_py"], "run"),
+                mock.patch.object(command, "warn") as warn,
+            ):
+                command.run()
+            warn.assert_called_once()
+        assert not os.path.exists(out_file)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,38 @@
+import os
+from os import path
+
 CN_ALIAS = {"本": "当前,这个,这", "内": "以内,之内", "以前": "之前"}
 YEAR_ALIAS = {"今": "本", "去年": "上年", "明年": "下年"}
 QUARTER_ALIAS = {"上": "上个", "下": "下个"}
 MONTH_ALIAS = {"上": "上个", "下": "下个"}
 WEEK_ALIAS = {"周": "星期", "上": "上个", "下": "下个"}
 DAY_ALIAS = {"天": "日"}
+
+# 语法解析表的磁盘缓存目录, 设置为空字符串时不使用缓存
+CACHE_DIR = os.environ.get(
+    "CN2DATE_CACHE_DIR",
+    path.join(
+        os.environ.get("XDG_CACHE_HOME") or path.join(path.expanduser("~"), ".cache"),
+        "cn2date",
+    ),
+)
+
+# 构建语法解析器的选项, 打包时生成独立解析器模块也使用该选项
+PARSER_OPTIONS = {
+    "parser": "lalr",
+    "propagate_positions": False,
+    "maybe_placeholders": False,
+}
+
+# 日历边界表覆盖的年份范围, 例如 "1900-2100", 范围之外的日期使用 datetime 计算
+CALENDAR_YEARS = tuple(
+    int(year)
+    for year in os.environ.get("CN2DATE_CALENDAR_YEARS", "1900-2100").split("-")
+)
+
+# 解析结果缓存的最大条目数, 设置为 0 时不使用缓存
+PARSE_CACHE_SIZE = int(os.environ.get("CN2DATE_PARSE_CACHE_SIZE", "0"))
+
+# 异步解析时合并请求的时间窗口 (秒) 以及每批的最大字符串数
+ASYNC_BATCH_WINDOW = float(os.environ.get("CN2DATE_ASYNC_BATCH_WINDOW", "0.001"))
+ASYNC_BATCH_SIZE = int(os.environ.get("CN2DATE_ASYNC_BATCH_SIZE", "256"))
@@ -1,21 +1,64 @@
-import calendar
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import Optional, Tuple, Union
 
-from dateutil.relativedelta import relativedelta
+from . import conf
+from .calendar_table import CalendarTable, quarter_begin_month
+
+_table = CalendarTable(*conf.CALENDAR_YEARS)
 
 
 class DateTime:
+    """不可变的日期时间, 所有计算方法都返回新的对象
+
+    偏移与截断使用整数运算: 按年、季度、月偏移时计算月份序号,
+    按周、天、小时偏移以及计算一周的开始、结束时使用公历序数 (``date.toordinal``),
+    月份的天数与公历序数从日历边界表中查找
+    """
+
+    __slots__ = ("day", "hour", "millis", "min", "mon", "sec", "year")
+
     def __init__(
         self, year=None, mon=None, day=None, hour=None, min=None, sec=None, millis=None
     ):
-        self.year = 1970 if year is None else year
-        self.mon = 1 if mon is None else mon
-        self.day = 1 if day is None else day
-        self.hour = 0 if hour is None else hour
-        self.min = 0 if min is None else min
-        self.sec = 0 if sec is None else sec
-        self.millis = 0 if millis is None else millis
+        _set = object.__setattr__
+        _set(self, "year", 1970 if year is None else year)
+        _set(self, "mon", 1 if mon is None else mon)
+        _set(self, "day", 1 if day is None else day)
+        _set(self, "hour", 0 if hour is None else hour)
+        _set(self, "min", 0 if min is None else min)
+        _set(self, "sec", 0 if sec is None else sec)
+        _set(self, "millis", 0 if millis is None else millis)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DateTime is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("DateTime is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, DateTime):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return "DateTime(%d, %d, %d, %d, %d, %d, %d)" % self._key()
+
+    def __reduce__(self):
+        return (DateTime, self._key())
+
+    def _key(self):
+        return (
+            self.year,
+            self.mon,
+            self.day,
+            self.hour,
+            self.min,
+            self.sec,
+            self.millis,
+        )
 
     @staticmethod
     def now():
@@ -24,7 +67,8 @@ class DateTime:
     @staticmethod
     def of(d):
         if isinstance(d, DateTime):
-            return DateTime(d.year, d.mon, d.day, d.hour, d.min, d.sec, d.millis)
+            # 不可变对象无需复制
+            return d
         elif isinstance(d, datetime):
             return DateTime(
                 d.year, d.month, d.day, d.hour, d.minute, d.second, d.microsecond
@@ -116,6 +160,36 @@ class DateTime:
         """
         return self.offset_day(1)
 
+    def _ordinal(self) -> int:
+        ordinal = _table.ordinal(self.year, self.mon, self.day)
+        if (
+            ordinal is None
+            or not 0 <= self.hour <= 23
+            or not 0 <= self.min <= 59
+            or not 0 <= self.sec <= 59
+            or not 0 <= self.millis <= 999999
+        ):
+            # 超出边界表的范围或者字段无效时使用 datetime 计算, 抛出与之相同的异常
+            return self.datetime().toordinal()
+        return ordinal
+
+    def _with_ordinal(self, ordinal: int, *time) -> "DateTime":
+        return DateTime(*_table.from_ordinal(ordinal, self.year), *time)
+
+    def _offset_months(self, months: int) -> "DateTime":
+        # 按月份序号偏移, 日期超过目标月份的天数时取该月最后一天, 与 relativedelta 一致
+        self._ordinal()
+        year, mon = divmod(self.year * 12 + self.mon - 1 + months, 12)
+        if not 1 <= year <= 9999:
+            raise ValueError("year %d is out of range" % year)
+        day = min(self.day, _table.month_days(year, mon + 1))
+        return DateTime(year, mon + 1, day, self.hour, self.min, self.sec, self.millis)
+
+    def _offset_days(self, days: int) -> "DateTime":
+        return self._with_ordinal(
+            self._ordinal() + days, self.hour, self.min, self.sec, self.millis
+        )
+
     def offset_year(self, offset: int):
         """根据当前时间偏移计算出偏移后的日期
 
@@ -125,11 +199,7 @@ class DateTime:
         Returns:
             DateTime: 偏移后的日期
         """
-        dt = self.datetime() + relativedelta(years=offset)
-        self.__init__(
-            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, dt.microsecond
-        )
-        return self
+        return self._offset_months(offset * 12)
 
     def offset_quarter(self, offset: int):
         """根据当前时间偏移计算出偏移后的日期
@@ -140,11 +210,7 @@ class DateTime:
         Returns:
             DateTime: 偏移后的日期
         """
-        dt = self.datetime() + relativedelta(months=offset * 3)
-        self.__init__(
-            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, dt.microsecond
-        )
-        return self
+        return self._offset_months(offset * 3)
 
     def offset_month(self, offset: int):
         """根据当前时间偏移计算出偏移后的日期
@@ -155,11 +221,7 @@ class DateTime:
         Returns:
             DateTime: 偏移后的日期
         """
-        dt = self.datetime() + relativedelta(months=offset)
-        self.__init__(
-            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, dt.microsecond
-        )
-        return self
+        return self._offset_months(offset)
 
     def offset_week(self, offset: int):
         """根据当前时间偏移计算出偏移后的日期
@@ -170,11 +232,7 @@ class DateTime:
         Returns:
             DateTime: 偏移后的日期
         """
-        dt = self.datetime() + relativedelta(days=offset * 7)
-        self.__init__(
-            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, dt.microsecond
-        )
-        return self
+        return self._offset_days(offset * 7)
 
     def offset_day(self, offset: int):
         """根据当前时间偏移计算出偏移后的日期
@@ -185,11 +243,21 @@ class DateTime:
         Returns:
             DateTime: 偏移后的日期
         """
-        dt = self.datetime() + relativedelta(days=offset)
-        self.__init__(
-            dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, dt.microsecond
+        return self._offset_days(offset)
+
+    def offset_hour(self, offset: int):
+        """根据当前时间偏移计算出偏移后的日期
+
+        Args:
+            offset (int): 偏移量
+
+        Returns:
+            DateTime: 偏移后的日期
+        """
+        days, hour = divmod(self.hour + offset, 24)
+        return self._with_ordinal(
+            self._ordinal() + days, hour, self.min, self.sec, self.millis
         )
-        return self
 
     def begin_of_year(self):
         """根据当前时间偏移计算出一年开始的日期
@@ -197,8 +265,7 @@ class DateTime:
         Returns:
             DateTime: 一年的开始日期
         """
-        self.__init__(self.year)
-        return self
+        return DateTime(self.year)
 
     def end_of_year(self):
         """根据当前时间偏移计算出一年结束的日期
@@ -206,8 +273,7 @@ class DateTime:
         Returns:
             DateTime: 一年的结束日期
         """
-        self.__init__(self.year, 12, 31, 23, 59, 59, 999999)
-        return self
+        return DateTime(self.year, 12, 31, 23, 59, 59, 999999)
 
     def begin_of_quarter(self):
         """根据当前时间偏移计算出一季度开始的日期
@@ -215,16 +281,7 @@ class DateTime:
         Returns:
             DateTime: 一季度的开始日期
         """
-        if self.mon in [1, 2, 3]:
-            m = 1
-        elif self.mon in [4, 5, 6]:
-            m = 4
-        elif self.mon in [7, 8, 9]:
-            m = 7
-        else:
-            m = 10
-        self.__init__(self.year, m, 1)
-        return self
+        return DateTime(self.year, quarter_begin_month(self.mon), 1)
 
     def end_of_quarter(self):
         """根据当前时间偏移计算出一季度结束的日期
@@ -232,12 +289,9 @@ class DateTime:
         Returns:
             DateTime: 一季度的结束日期
         """
-
-        self.begin_of_quarter()
-        last_mon = self.mon + (3 - 1)
-        last_day = calendar.monthrange(self.year, last_mon)[1]
-        self.__init__(self.year, last_mon, last_day, 23, 59, 59, 999999)
-        return self
+        last_mon = quarter_begin_month(self.mon) + 2
+        last_day = _table.month_days(self.year, last_mon)
+        return DateTime(self.year, last_mon, last_day, 23, 59, 59, 999999)
 
     def begin_of_month(self):
         """根据当前时间偏移计算出一月开始的日期
@@ -245,8 +299,7 @@ class DateTime:
         Returns:
             DateTime: 一月的开始日期
         """
-        self.__init__(self.year, self.mon, 1)
-        return self
+        return DateTime(self.year, self.mon, 1)
 
     def end_of_month(self):
         """根据当前时间偏移计算出一月结束的日期
@@ -254,9 +307,8 @@ class DateTime:
         Returns:
             DateTime: 一月的结束日期
         """
-        last_day = calendar.monthrange(self.year, self.mon)[1]
-        self.__init__(self.year, self.mon, last_day, 23, 59, 59, 999999)
-        return self
+        last_day = _table.month_days(self.year, self.mon)
+        return DateTime(self.year, self.mon, last_day, 23, 59, 59, 999999)
 
     def begin_of_week(self):
         """根据当前时间偏移计算出一周开始的日期
@@ -264,10 +316,9 @@ class DateTime:
         Returns:
             DateTime: 一周的开始日期
         """
-        index_of_week = self.datetime().weekday()
-        dt = self.offset_day(-index_of_week)
-        self.__init__(dt.year, dt.mon, dt.day)
-        return self
+        # 公历序数 1 (0001-01-01) 是星期一
+        ordinal = self._ordinal()
+        return self._with_ordinal(ordinal - (ordinal - 1) % 7)
 
     def end_of_week(self):
         """根据当前时间偏移计算出一周结束的日期
@@ -275,10 +326,8 @@ class DateTime:
         Returns:
             DateTime: 一周的结束日期
         """
-        index_of_week = self.datetime().weekday()
-        dt = self.offset_day(7 - (index_of_week + 1))
-        self.__init__(dt.year, dt.mon, dt.day, 23, 59, 59, 999999)
-        return self
+        ordinal = self._ordinal()
+        return self._with_ordinal(ordinal + 6 - (ordinal - 1) % 7, 23, 59, 59, 999999)
 
     def begin_of_day(self):
         """根据当前时间偏移计算出一天开始的日期
@@ -286,8 +335,7 @@ class DateTime:
         Returns:
             DateTime: 一天的开始日期
         """
-        self.__init__(self.year, self.mon, self.day)
-        return self
+        return DateTime(self.year, self.mon, self.day)
 
     def end_of_day(self):
         """根据当前时间偏移计算出一天结束的日期
@@ -295,8 +343,23 @@ class DateTime:
         Returns:
             DateTime: 一天的结束日期
         """
-        self.__init__(self.year, self.mon, self.day, 23, 59, 59, 999999)
-        return self
+        return DateTime(self.year, self.mon, self.day, 23, 59, 59, 999999)
+
+    def begin_of_hour(self):
+        """根据当前时间偏移计算出一小时开始的日期
+
+        Returns:
+            DateTime: 一小时的开始日期
+        """
+        return DateTime(self.year, self.mon, self.day, self.hour)
+
+    def end_of_hour(self):
+        """根据当前时间偏移计算出一小时结束的日期
+
+        Returns:
+            DateTime: 一小时的结束日期
+        """
+        return DateTime(self.year, self.mon, self.day, self.hour, 59, 59, 999999)
 
     def datetime(self):
         return datetime(
@@ -304,8 +367,137 @@ class DateTime:
         )
 
 
-class DateBetween(List[DateTime]):
+class DateBetween:
+    """不可变的日期范围, 开始与结束时间以 Unix 纪元起的微秒数 (不含时区) 保存
+
+    ``result[0]``、``result[1]`` 以及解包时按需构造 DateTime, 批量处理时可以使用
+    :meth:`datetimes` 直接得到 datetime。包含无效日期 (例如 2 月 30 日) 的范围保存原始的 DateTime
+    """
+
+    __slots__ = ("_begin", "_end")
+
     def __init__(self, begin: DateTime, end: DateTime):
-        super().__init__()
-        self.append(begin)
-        self.append(end)
+        _set = object.__setattr__
+        _set(self, "_begin", _encode(begin))
+        _set(self, "_end", _encode(end))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DateBetween is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("DateBetween is immutable")
+
+    @property
+    def begin(self) -> DateTime:
+        return _decode(self._begin)
+
+    @property
+    def end(self) -> DateTime:
+        return _decode(self._end)
+
+    def __getitem__(self, i):
+        if i == 0 or i == -2:
+            return self.begin
+        if i == 1 or i == -1:
+            return self.end
+        return (self.begin, self.end)[i]
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        yield self.begin
+        yield self.end
+
+    def __eq__(self, other):
+        if not isinstance(other, DateBetween):
+            return NotImplemented
+        return self._begin == other._begin and self._end == other._end
+
+    def __hash__(self):
+        return hash((self._begin, self._end))
+
+    def __repr__(self):
+        return "DateBetween(%r, %r)" % (self.begin, self.end)
+
+    def __reduce__(self):
+        return (DateBetween._of_raw, (self._begin, self._end))
+
+    @staticmethod
+    def _of_raw(begin, end) -> "DateBetween":
+        r = object.__new__(DateBetween)
+        object.__setattr__(r, "_begin", begin)
+        object.__setattr__(r, "_end", end)
+        return r
+
+    @staticmethod
+    def of(d):
+        if isinstance(d, DateBetween):
+            # 不可变对象无需复制
+            return d
+        return DateBetween(DateTime.of(d[0]), DateTime.of(d[1]))
+
+    def epoch_us(self) -> Tuple[Optional[int], Optional[int]]:
+        """开始与结束时间距 Unix 纪元的微秒数 (不含时区)
+
+        Returns:
+            Tuple[Optional[int], Optional[int]]: 开始时间与结束时间, 无效日期为 None
+        """
+        return (
+            self._begin if isinstance(self._begin, int) else None,
+            self._end if isinstance(self._end, int) else None,
+        )
+
+    def datetimes(self) -> Tuple[datetime, datetime]:
+        """开始与结束时间的 datetime, 不构造 DateTime
+
+        Returns:
+            Tuple[datetime, datetime]: 开始时间与结束时间
+        """
+        return _to_datetime(self._begin), _to_datetime(self._end)
+
+
+# 0001-01-01 到 1970-01-01 的天数, 以及一天的微秒数
+_EPOCH_ORDINAL = 719163
+_DAY_US = 86400 * 1000000
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _encode(d: DateTime) -> Union[int, DateTime]:
+    ordinal = _table.ordinal(d.year, d.mon, d.day)
+    valid_time = (
+        0 <= d.hour <= 23
+        and 0 <= d.min <= 59
+        and 0 <= d.sec <= 59
+        and 0 <= d.millis <= 999999
+    )
+    if ordinal is None or not valid_time:
+        try:
+            ordinal = d.datetime().toordinal()
+        except (ValueError, TypeError, OverflowError):
+            # 无效的日期保留原始的 DateTime, 使用时再抛出异常
+            return d
+    return (
+        (ordinal - _EPOCH_ORDINAL) * _DAY_US
+        + ((d.hour * 60 + d.min) * 60 + d.sec) * 1000000
+        + d.millis
+    )
+
+
+def _decode(value: Union[int, DateTime]) -> DateTime:
+    if isinstance(value, DateTime):
+        return value
+    days, us = divmod(value, _DAY_US)
+    secs, millis = divmod(us, 1000000)
+    mins, sec = divmod(secs, 60)
+    hour, min = divmod(mins, 60)
+    year, mon, day = _table.from_ordinal(
+        days + _EPOCH_ORDINAL, 1970 + days * 400 // 146097
+    )
+    return DateTime(year, mon, day, hour, min, sec, millis)
+
+
+def _to_datetime(value: Union[int, DateTime]) -> datetime:
+    if isinstance(value, DateTime):
+        return value.datetime()
+    return _EPOCH + timedelta(microseconds=value)
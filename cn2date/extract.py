@@ -0,0 +1,145 @@
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .cn2date import compile
+from .datetime import DateBetween, DateTime
+from .plan import DatePlan, RelativePlan
+from .router import _CHINE_DATE_CHARS, _CHINE_DATE_UNITS, _DIGITS, _NORM_DATE_CHARS
+
+# 日期片段中必须出现的关键字: 口语化日期的时间单位以及常规日期的单位与分隔符
+_TRIGGERS = (*_CHINE_DATE_UNITS, "号", "-", "/")
+# 日期片段中可能出现的全部字符, 语法忽略的空格在文本中视为分隔
+_DATE_CHARS = (_NORM_DATE_CHARS | _CHINE_DATE_CHARS) - {" "}
+# 两个语法中最长的日期片段的长度, 例如“二零一七年十二月三十一日”、“上半十个季度以内”
+_MAX_SPAN = 16
+
+
+class _TriggerIndex:
+    """关键字的 Aho-Corasick 自动机, 一次扫描找出文本中所有关键字出现的位置"""
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[str, ...]] = [()]
+        for word in words:
+            state = 0
+            for c in word:
+                if c not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[state][c] = len(self._goto) - 1
+                state = self._goto[state][c]
+            self._out[state] += (word,)
+
+        # 按深度顺序计算失败转移, 并合并失败状态的输出
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for c, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(c, 0)
+                self._fail[child] = fail
+                self._out[child] += self._out[self._fail[child]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int]]:
+        """按结束位置的顺序返回每个关键字出现的开始与结束位置
+
+        Args:
+            text (str): 文本
+
+        Returns:
+            Iterator[Tuple[int, int]]: 开始位置与结束位置
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, c in enumerate(text):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for word in out[state]:
+                yield i + 1 - len(word), i + 1
+
+
+_index = _TriggerIndex(_TRIGGERS)
+
+
+def extract(
+    text: str, now: Union[DateTime, datetime, None] = None
+) -> Iterator[Tuple[int, int, DateBetween]]:
+    """找出文本中的中文日期、口语, 并转换为日期范围
+
+    先使用关键字索引找出文本中的时间单位与分隔符, 只在关键字附近、由语法字符组成的片段上尝试解析,
+    每个关键字尝试的片段数量有上限, 耗时与文本长度成正比。
+    片段按从左到右、同一位置取最长的顺序选取, 互不重叠, 例如
+    “请把去年三月和本季度的报表发我” 中识别出“去年”、“三月”与“本季度”。
+    只包含数字与分隔符的片段需要是完整的年月日或者以四位年份开头,
+    避免把“1/2”、“3-5”这类数字识别为日期
+
+    Args:
+        text (str): 文本
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间, 整段文本使用同一个参考时间
+
+    Returns:
+        Iterator[Tuple[int, int, DateBetween]]: 日期片段的开始位置、结束位置以及日期范围
+    """
+    n = DateTime.now() if now is None else DateTime.of(now)
+    plans: Dict[str, Union[DatePlan, RelativePlan, None]] = {}
+    pos = 0
+    for u, v in _index.finditer(text):
+        if u < pos:
+            continue
+        # 关键字所在的由语法字符组成的片段
+        begin = u
+        while begin > max(pos, v - _MAX_SPAN) and text[begin - 1] in _DATE_CHARS:
+            begin -= 1
+        end = v
+        while end < min(len(text), u + _MAX_SPAN) and text[end] in _DATE_CHARS:
+            end += 1
+
+        span = _match(text, begin, u, v, end, plans)
+        if span is not None:
+            i, j, plan = span
+            pos = j
+            yield i, j, plan.evaluate(n)
+
+
+def _match(
+    text: str,
+    begin: int,
+    u: int,
+    v: int,
+    end: int,
+    plans: Dict[str, Union[DatePlan, RelativePlan, None]],
+) -> Optional[Tuple[int, int, Union[DatePlan, RelativePlan]]]:
+    # 开始位置从左到右, 结束位置从长到短, 片段必须包含关键字
+    for i in range(begin, u + 1):
+        # 不从一个数字的中间开始或结束
+        if i > 0 and text[i - 1] in _DIGITS and text[i] in _DIGITS:
+            continue
+        for j in range(min(end, i + _MAX_SPAN), v - 1, -1):
+            if j < len(text) and text[j - 1] in _DIGITS and text[j] in _DIGITS:
+                continue
+            s = text[i:j]
+            if s not in plans:
+                plans[s] = _compile(s) if _is_mention(s) else None
+            if plans[s] is not None:
+                return i, j, plans[s]
+    return None
+
+
+def _compile(s: str) -> Union[DatePlan, RelativePlan, None]:
+    try:
+        return compile(s)
+    except Exception:
+        # 语法可以识别但无法求值的片段 (例如“十季度”) 在文本中视为不是日期
+        return None
+
+
+def _is_mention(s: str) -> bool:
+    if any(c not in _DIGITS and c not in "-/" for c in s):
+        return True
+    groups = s.replace("/", "-").split("-")
+    return len(groups) == 3 or len(groups[0]) == 4
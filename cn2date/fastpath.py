@@ -0,0 +1,98 @@
+import re
+from typing import Optional
+
+from .plan import DatePlan
+
+# 由阿拉伯数字与分隔符组成的常规日期, 最多三段数字, 例如 “2017-7-23”、“2017年7月23日”
+_FAST_DATE = re.compile(
+    r"([0-9]+)(?:([年月日号/-])([0-9]+)(?:([年月日号/-])([0-9]+))?)?([年月日号/-]?)"
+)
+
+# 一段数字可以充当的成分, 与 norm_date.lark 中终结符的划分一致
+_YEAR = 1
+_MONTH = 2
+_DAY = 4
+
+_YEAR_DELIMITERS = ("年", "-", "/")
+_MONTH_DELIMITERS = ("月", "-", "/")
+_DAY_DELIMITERS = ("日", "号")
+
+
+def _roles(digits: str) -> int:
+    if len(digits) == 4:
+        # YEAR, 例如 “2017”
+        return _YEAR if digits[0] != "0" else 0
+    if len(digits) == 2:
+        n = int(digits)
+        if n == 0 or n >= 32:
+            # YEAR, 例如 “00”、“99”
+            return _YEAR
+        if n <= 12:
+            # YEAR_MONTH_DAY, 例如 “07”、“11”
+            return _YEAR | _MONTH | _DAY
+        # YEAR_DAY, 例如 “23”、“31”
+        return _YEAR | _DAY
+    if len(digits) == 1 and digits != "0":
+        # MONTH_DAY, 例如 “7”
+        return _MONTH | _DAY
+    return 0
+
+
+def compile_fast(s: str) -> Optional[DatePlan]:
+    """使用正则表达式编译由阿拉伯数字组成的常规日期, 不经过 lark 与 cn2an
+
+    规则与优先级与 norm_date.lark 一致, 结果与语法解析的结果相同。
+    包含中文数字或者不符合规则的字符串返回 None, 交由语法解析
+
+    Args:
+        s (str): 日期字符串
+
+    Returns:
+        Optional[DatePlan]: 执行计划, 无法快速识别时返回 None
+    """
+    m = _FAST_DATE.fullmatch(s)
+    if m is None:
+        return None
+
+    first, d1, second, d2, third, tail = m.groups()
+    a = _roles(first)
+    if third is not None:
+        # year_month_day
+        if (
+            a & _YEAR
+            and d1 in _YEAR_DELIMITERS
+            and _roles(second) & _MONTH
+            and d2 in _MONTH_DELIMITERS
+            and _roles(third) & _DAY
+            and (not tail or tail in _DAY_DELIMITERS)
+        ):
+            return DatePlan(int(first), int(second), int(third))
+        return None
+
+    if second is not None:
+        b = _roles(second)
+        # year_month 的优先级高于 month_day, 例如 “07-11” 识别为 yy-MM
+        if (
+            a & _YEAR
+            and d1 in _YEAR_DELIMITERS
+            and b & _MONTH
+            and (not tail or tail in _MONTH_DELIMITERS)
+        ):
+            return DatePlan(int(first), int(second), None)
+        if (
+            a & _MONTH
+            and d1 in _MONTH_DELIMITERS
+            and b & _DAY
+            and (not tail or tail in _DAY_DELIMITERS)
+        ):
+            return DatePlan(None, int(first), int(second))
+        return None
+
+    # year_only、month_only、day_only 依次降低优先级
+    if a & _YEAR and (not tail or tail in _YEAR_DELIMITERS):
+        return DatePlan(int(first), None, None)
+    if a & _MONTH and (not tail or tail in _MONTH_DELIMITERS):
+        return DatePlan(None, int(first), None)
+    if a & _DAY and (not tail or tail in _DAY_DELIMITERS):
+        return DatePlan(None, None, int(first))
+    return None
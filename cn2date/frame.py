@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Union
+
+from .array import parse_array
+from .datetime import DateTime
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+
+def parse_series(
+    series: "pd.Series", now: Union[DateTime, datetime, None] = None
+) -> "pd.DataFrame":
+    """将 pandas 中的日期字符串列转换为开始时间与结束时间两列
+
+    先对列做因子化 (``pd.factorize``), 每个不同的字符串只解析一次, 再按因子编码广播回每一行,
+    适用于行数很多而不同取值很少的列。需要安装 pandas
+
+    Args:
+        series (pd.Series): 日期字符串列, 缺失值与无法识别的行为 NaT
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+    Returns:
+        pd.DataFrame: 与输入索引一致的 ``begin``、``end`` 两列, 类型为 ``datetime64[us]``
+    """
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError as e:
+        raise ImportError("parse_series requires pandas: pip install pandas") from e
+
+    codes, uniques = pd.factorize(series)
+    begin, end = parse_array(uniques, now)
+    # 缺失值的编码为 -1, 取到末尾追加的 NaT
+    nat = np.array(["NaT"], dtype="datetime64[us]")
+    return pd.DataFrame(
+        {
+            "begin": np.concatenate([begin, nat]).take(codes),
+            "end": np.concatenate([end, nat]).take(codes),
+        },
+        index=series.index,
+    )
+
+
+def parse_arrow(
+    array: Union["pa.Array", "pa.ChunkedArray"],
+    now: Union[DateTime, datetime, None] = None,
+) -> "pa.Table":
+    """将 Arrow 中的日期字符串列转换为开始时间与结束时间两列
+
+    先取出不同的字符串并计算每一行的序号 (``pc.unique``、``pc.index_in``),
+    每个不同的字符串只解析一次, 再按序号取出结果。需要安装 pyarrow 与 NumPy
+
+    Args:
+        array (Union[pa.Array, pa.ChunkedArray]): 日期字符串列, 空值与无法识别的行为 null
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+    Returns:
+        pa.Table: ``begin``、``end`` 两列, 类型为 ``timestamp[us]``
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError as e:
+        raise ImportError("parse_arrow requires pyarrow: pip install pyarrow") from e
+
+    uniques = pc.unique(array).drop_null()
+    indices = pc.index_in(array, value_set=uniques)
+    begin, end = parse_array(uniques.to_pylist(), now)
+    return pa.table(
+        {
+            "begin": pc.take(pa.array(begin, from_pandas=True), indices),
+            "end": pc.take(pa.array(end, from_pandas=True), indices),
+        }
+    )
@@ -0,0 +1,232 @@
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# 当前启用的统计, 未启用时为 None; 各阶段只检查这一个变量, 关闭时几乎没有额外开销
+current: Optional["Metrics"] = None
+
+# 带标签的计数器的标签名称
+_LABELS = {
+    "handled": ("grammar", "rule"),
+    "rejections": ("reason",),
+    "parse_errors": ("grammar",),
+}
+
+
+class ParseEvent(NamedTuple):
+    """一次编译的记录, 传给 :func:`instrument` 的回调函数"""
+
+    # 输入的字符串
+    text: str
+    # 识别该字符串的语法, 无法识别时为 None
+    grammar: Optional[str]
+    # 识别该字符串的语法规则, 例如 “year_month_day”、“days”
+    rule: Optional[str]
+    # 各阶段的耗时 (秒), 例如 “route”、“norm_date.fast_path”、“chine_date.parse”
+    stages: Dict[str, float]
+    # 第一个语法失败后由后面的语法识别
+    fallback: bool
+    # 编译过程中抛出的异常, 例如语法可以识别但无法转换的“十季度”
+    error: Optional[Exception]
+
+
+class Trace:
+    """一次编译中各阶段的耗时, 由编译的各个步骤填写"""
+
+    __slots__ = ("grammar", "rule", "stages", "text")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.grammar: Optional[str] = None
+        self.rule: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+
+    def timed(self, stage: str, func: Callable, *args) -> Any:
+        """调用函数并记录耗时, 阶段名称以当前尝试的语法为前缀, 抛出异常时记录为 ``<阶段>_error``
+
+        Args:
+            stage (str): 阶段名称
+            func (Callable): 函数
+            *args: 函数的参数
+
+        Returns:
+            Any: 函数的返回值
+        """
+        name = stage if self.grammar is None else f"{self.grammar}.{stage}"
+        t = perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            self.stages[f"{name}_error"] = perf_counter() - t
+            raise
+        self.stages[name] = perf_counter() - t
+        return result
+
+
+class Metrics:
+    """累计的各阶段耗时与计数, 可以导出为字典或者 Prometheus 文本格式
+
+    计数包括: 编译的字符串数 (inputs)、各语法与规则识别的次数 (handled)、
+    第一个语法失败后由后面的语法识别的次数 (fallbacks)、被路由或者语法拒绝的次数 (rejections)、
+    语法解析失败的次数 (parse_errors) 以及编译抛出异常的次数 (errors)
+    """
+
+    def __init__(self, callback: Optional[Callable[[ParseEvent], None]] = None):
+        """
+        Args:
+            callback (Optional[Callable[[ParseEvent], None]]): 每次编译之后调用的函数
+        """
+        self.callback = callback
+        self._lock = Lock()
+        self._stages: Dict[str, List[float]] = {}
+        self._counters: Dict[str, Dict[Tuple[str, ...], int]] = {}
+
+    def observe(self, stage: str, seconds: float):
+        """记录一个阶段的耗时
+
+        Args:
+            stage (str): 阶段名称
+            seconds (float): 耗时 (秒)
+        """
+        with self._lock:
+            self._observe(stage, seconds)
+
+    def _observe(self, stage: str, seconds: float):
+        total = self._stages.get(stage)
+        if total is None:
+            total = self._stages[stage] = [0, 0.0]
+        total[0] += 1
+        total[1] += seconds
+
+    def _inc(self, name: str, *labels: str):
+        counter = self._counters.setdefault(name, {})
+        counter[labels] = counter.get(labels, 0) + 1
+
+    def record(
+        self,
+        trace: Trace,
+        names: Tuple[str, ...],
+        plan: Any,
+        error: Optional[Exception] = None,
+    ):
+        """记录一次编译的结果
+
+        Args:
+            trace (Trace): 编译中各阶段的耗时
+            names (Tuple[str, ...]): 路由选择的语法
+            plan (Any): 编译结果, 无法识别时为 None
+            error (Optional[Exception]): 编译过程中抛出的异常
+        """
+        grammar = None if plan is None else trace.grammar
+        fallback = grammar is not None and grammar != names[0]
+        with self._lock:
+            self._inc("inputs")
+            for stage, seconds in trace.stages.items():
+                self._observe(stage, seconds)
+                if stage.endswith(".parse_error"):
+                    self._inc("parse_errors", stage.split(".", 1)[0])
+            if error is not None:
+                self._inc("errors")
+            elif not names:
+                self._inc("rejections", "router")
+            elif grammar is None:
+                self._inc("rejections", "grammar")
+            else:
+                self._inc("handled", grammar, trace.rule or "")
+                if fallback:
+                    self._inc("fallbacks")
+        if self.callback is not None:
+            self.callback(
+                ParseEvent(
+                    trace.text, grammar, trace.rule, trace.stages, fallback, error
+                )
+            )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """当前统计的快照
+
+        Returns:
+            Dict[str, Dict[str, Any]]: ``stages`` 为各阶段的次数与总耗时 (秒),
+                ``counters`` 为各计数, 带标签的计数以 “/” 连接的标签为键
+        """
+        with self._lock:
+            stages = {
+                stage: {"count": count, "seconds": seconds}
+                for stage, (count, seconds) in sorted(self._stages.items())
+            }
+            counters: Dict[str, Any] = {}
+            for name, counter in sorted(self._counters.items()):
+                if name in _LABELS:
+                    counters[name] = {
+                        "/".join(labels): value
+                        for labels, value in sorted(counter.items())
+                    }
+                else:
+                    counters[name] = counter[()]
+        return {"stages": stages, "counters": counters}
+
+    def prometheus(self, prefix: str = "cn2date") -> str:
+        """导出为 Prometheus 文本格式
+
+        Args:
+            prefix (str): 指标名称的前缀
+
+        Returns:
+            str: Prometheus 文本格式的指标
+        """
+        lines = [f"# TYPE {prefix}_stage_seconds summary"]
+        with self._lock:
+            for stage, (count, seconds) in sorted(self._stages.items()):
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {count}')
+                lines.append(
+                    f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {seconds!r}'
+                )
+            for name, counter in sorted(self._counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for labels, value in sorted(counter.items()):
+                    pairs = ",".join(
+                        f'{k}="{v}"' for k, v in zip(_LABELS.get(name, ()), labels)
+                    )
+                    pairs = f"{{{pairs}}}" if pairs else ""
+                    lines.append(f"{prefix}_{name}_total{pairs} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+
+def set_metrics(metrics: Optional[Metrics]) -> Optional[Metrics]:
+    """启用统计, 设置为 None 时关闭, 对所有线程生效
+
+    Args:
+        metrics (Optional[Metrics]): 统计
+
+    Returns:
+        Optional[Metrics]: 之前启用的统计
+    """
+    global current
+    previous, current = current, metrics
+    return previous
+
+
+@contextmanager
+def instrument(
+    callback: Optional[Callable[[ParseEvent], None]] = None,
+) -> Iterator[Metrics]:
+    """在 with 语句内统计各阶段的耗时与计数, 退出时恢复之前的统计
+
+    Args:
+        callback (Optional[Callable[[ParseEvent], None]]): 每次编译之后调用的函数
+
+    Returns:
+        Iterator[Metrics]: 统计
+    """
+    metrics = Metrics(callback)
+    previous = set_metrics(metrics)
+    try:
+        yield metrics
+    finally:
+        set_metrics(previous)
@@ -0,0 +1,50 @@
+import re
+
+_DIGITS = {c: str(i) for i, c in enumerate("零一二三四五六七八九")}
+
+# 连续的中文数字
+_NUMERAL = re.compile("[零一二三四五六七八九十]+")
+# 带“十”的中文数字, 例如“十”、“十一”、“二十”、“二十三”
+_TENS = re.compile("([一二三四五六七八九])?十([一二三四五六七八九])?")
+# 紧跟“年”的阿拉伯数字与“十”, 例如“半十年”替换后的“0.5十年”
+_TENS_YEAR = re.compile(r"([0-9]+\.)?[0-9]+十(?=年)")
+
+
+def _replace(m: "re.Match") -> str:
+    s = m.group()
+    if "十" not in s:
+        # 逐位读出的数字, 例如“二零一七”、“零七”
+        return str(int("".join(_DIGITS[c] for c in s)))
+    tens = _TENS.fullmatch(s)
+    if tens is None:
+        # 其他形式不在语法范围内, 保持原样
+        return s
+    high, low = tens.groups()
+    return str(
+        int(_DIGITS[high] if high else "1") * 10 + int(_DIGITS[low] if low else "0")
+    )
+
+
+def _replace_tens_year(m: "re.Match") -> str:
+    n = float(m.group()[:-1]) * 10
+    return str(int(n)) if n.is_integer() else str(n)
+
+
+def to_arabic(s: str) -> str:
+    """将字符串中的中文数字转换为阿拉伯数字, 其余字符保持不变
+
+    只覆盖两个语法可以识别的形式: 逐位读出的数字、一百以内带“十”的数字以及“两”、“半”,
+    转换结果与 ``cn2an.transform(s)`` 一致, 例如 “前两年” 转换为 “前2年”,
+    “二零一七” 转换为 “2017”
+
+    Args:
+        s (str): 字符串
+
+    Returns:
+        str: 转换后的字符串
+    """
+    if "两" in s or "半" in s or "廿" in s:
+        s = s.replace("廿", "二十").replace("半", "0.5").replace("两", "2")
+        # cn2an 在“年”之前会把数字与单位合在一起计算, 例如“0.5十年”转换为“5年”
+        s = _TENS_YEAR.sub(_replace_tens_year, s)
+    return _NUMERAL.sub(_replace, s)
@@ -0,0 +1,70 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Union
+
+from .cn2date import (
+    CHINE_DATE_GRAMMAR_FILE,
+    NORM_DATE_GRAMMAR_FILE,
+    _parser,
+    parse_many,
+)
+from .datetime import DateBetween, DateTime
+
+
+def parse_parallel(
+    iterable: Iterable[str],
+    now: Union[DateTime, datetime, None] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 4096,
+) -> Iterator[Optional[DateBetween]]:
+    """使用多进程批量将中文日期、口语转换为日期范围
+
+    输入按 ``chunksize`` 分块发送给工作进程, 每个工作进程只加载一次解析器,
+    每块使用 :func:`parse_many` 解析。结果按输入顺序逐条返回, 同时最多只有
+    ``workers`` 的两倍数量的分块在处理中, 输入可以是无法一次放入内存的迭代器
+
+    Args:
+        iterable (Iterable[str]): 日期字符串
+        now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间, 所有分块使用同一个参考时间
+        workers (Optional[int]): 工作进程数, 默认为 CPU 核心数
+        chunksize (int): 每块的行数
+
+    Returns:
+        Iterator[Optional[DateBetween]]: 与输入顺序一致的日期范围, 无法识别时为 None
+    """
+    if chunksize <= 0:
+        raise ValueError("chunksize must be greater than 0")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        raise ValueError("workers must be greater than 0")
+
+    n = DateTime.now() if now is None else DateTime.of(now)
+    chunks = _chunks(iterable, chunksize)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(parse_many, chunk, n))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _chunks(iterable: Iterable[str], chunksize: int) -> Iterator[List[str]]:
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _warm_up():
+    # 工作进程启动时加载两个解析器, 之后的分块不再需要加载;
+    # 阿拉伯数字的日期走快速路径, 不会触发语法解析, 因此直接加载解析器
+    _parser("norm_date", NORM_DATE_GRAMMAR_FILE)
+    _parser("chine_date", CHINE_DATE_GRAMMAR_FILE)
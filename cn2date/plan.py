@@ -0,0 +1,175 @@
+from datetime import datetime
+from functools import wraps
+from time import perf_counter
+from typing import Callable, NamedTuple, Optional, Union
+
+from . import metrics
+from .datetime import DateBetween, DateTime
+
+# 各单位对应的截断、偏移以及结束时间的计算方法
+_BEGIN_OF = {
+    "year": DateTime.begin_of_year,
+    "quarter": DateTime.begin_of_quarter,
+    "month": DateTime.begin_of_month,
+    "week": DateTime.begin_of_week,
+    "day": DateTime.begin_of_day,
+    "hour": DateTime.begin_of_hour,
+}
+_END_OF = {
+    "year": DateTime.end_of_year,
+    "quarter": DateTime.end_of_quarter,
+    "month": DateTime.end_of_month,
+    "week": DateTime.end_of_week,
+    "day": DateTime.end_of_day,
+    "hour": DateTime.end_of_hour,
+}
+_OFFSET = {
+    "year": DateTime.offset_year,
+    "quarter": DateTime.offset_quarter,
+    "month": DateTime.offset_month,
+    "week": DateTime.offset_week,
+    "day": DateTime.offset_day,
+    "hour": DateTime.offset_hour,
+}
+
+
+def _now(now: Union[DateTime, datetime, None]) -> DateTime:
+    return DateTime.now() if now is None else DateTime.of(now)
+
+
+def _timed(evaluate: Callable) -> Callable:
+    # 启用统计时记录求值的耗时, 未启用时只多一次判断
+    @wraps(evaluate)
+    def wrapper(self, now: Union[DateTime, datetime, None] = None) -> DateBetween:
+        current = metrics.current
+        if current is None:
+            return evaluate(self, now)
+        t = perf_counter()
+        result = evaluate(self, now)
+        current.observe("evaluate", perf_counter() - t)
+        return result
+
+    return wrapper
+
+
+class RelativePlan(NamedTuple):
+    """口语化日期的执行计划, 与参考时间无关, 可以重复求值
+
+    求值时先将参考时间截断到 ``anchor`` 单位的开始, 再偏移 ``offset`` 个 ``unit``
+    得到开始时间, 结束时间为开始时间之后第 ``span`` 个 ``unit`` 的结束。
+    例如“前三个月”为 ``RelativePlan("month", "month", -3, 3)``,
+    “下半年”为 ``RelativePlan("month", "year", 6, 6)``
+    """
+
+    unit: str
+    anchor: str
+    offset: int
+    span: int
+
+    @property
+    def direction(self) -> int:
+        """日期范围相对参考时间的方向
+
+        Returns:
+            int: -1 表示过去, 1 表示未来, 0 表示包含参考时间所在的 anchor 单位
+        """
+        if self.unit != self.anchor:
+            return 0
+        if self.offset + self.span <= 0:
+            return -1
+        if self.offset > 0:
+            return 1
+        return 0
+
+    def bucket(self, now: Union[DateTime, datetime, None] = None) -> Optional[tuple]:
+        """求值结果所依赖的参考时间分段, 分段相同时求值结果相同
+
+        Args:
+            now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+        Returns:
+            Optional[tuple]: 参考时间截断到 anchor 单位后的日期
+        """
+        n = _BEGIN_OF[self.anchor](_now(now))
+        return (n.year, n.mon, n.day)
+
+    @_timed
+    def evaluate(self, now: Union[DateTime, datetime, None] = None) -> DateBetween:
+        """根据参考时间计算出日期范围
+
+        Args:
+            now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+        Returns:
+            DateBetween: 日期范围
+        """
+        begin = _OFFSET[self.unit](_BEGIN_OF[self.anchor](_now(now)), self.offset)
+        end = _END_OF[self.unit](_OFFSET[self.unit](begin, self.span - 1))
+        return DateBetween(begin, end)
+
+
+class DatePlan(NamedTuple):
+    """常规日期的执行计划, 缺少的年、月在求值时取参考时间的年、月
+
+    两位数的年份在求值时以参考时间的世纪补全, 例如“17年”为 ``DatePlan(17, None, None)``
+    """
+
+    year: Optional[int]
+    mon: Optional[int]
+    day: Optional[int]
+
+    @property
+    def unit(self) -> str:
+        if self.day is not None:
+            return "day"
+        if self.mon is not None:
+            return "month"
+        return "year"
+
+    def bucket(self, now: Union[DateTime, datetime, None] = None) -> Optional[tuple]:
+        """求值结果所依赖的参考时间分段, 分段相同时求值结果相同
+
+        Args:
+            now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+        Returns:
+            Optional[tuple]: 参考时间的分段, 完整的日期与参考时间无关, 返回 None
+        """
+        needs_year = self.year is None or len(str(self.year)) == 2
+        needs_mon = self.mon is None and self.day is not None
+        if not needs_year and not needs_mon:
+            return None
+
+        n = _now(now)
+        if self.year is None:
+            year = n.year
+        else:
+            year = str(n.year)[0:2] if needs_year else None
+        return (year, n.mon if needs_mon else None)
+
+    @_timed
+    def evaluate(self, now: Union[DateTime, datetime, None] = None) -> DateBetween:
+        """根据参考时间计算出日期范围
+
+        Args:
+            now (Union[DateTime, datetime, None]): 参考时间, 默认为当前时间
+
+        Returns:
+            DateBetween: 日期范围
+        """
+        n = _now(now)
+        year = n.year if self.year is None else self.year
+        if len(str(year)) == 2:
+            year = int(f"{str(n.year)[0:2]}{year}")
+
+        if self.mon is None and self.day is None:
+            begin = DateTime(year, 1, 1)
+            end = begin.end_of_year()
+        elif self.day is not None:
+            mon = n.mon if self.mon is None else self.mon
+            begin = DateTime(year, mon, self.day)
+            end = begin.end_of_day()
+        else:
+            begin = DateTime(year, self.mon, 1)
+            end = begin.end_of_month()
+        return DateBetween(begin, end)
@@ -0,0 +1,74 @@
+from typing import FrozenSet, NamedTuple, Set, Tuple
+
+NORM_DATE = "norm_date"
+CHINE_DATE = "chine_date"
+
+_DIGITS = "0123456789零一二三四五六七八九十"
+
+# 口语化日期必须包含其中一个时间单位
+_CHINE_DATE_UNITS = ("年", "季度", "月", "周", "星期", "天", "日", "午")
+
+
+class _Prefilter(NamedTuple):
+    """由语法文件推导出的字符集合与长度范围, 只用于排除一定无法识别的字符串"""
+
+    # 语法中可能出现的全部字符, 包括被忽略的字符
+    chars: FrozenSet[str]
+    # 被忽略的字符, 可以在记号之间出现任意次
+    ignore: FrozenSet[str]
+    # 记号的总长度范围, 不包括被忽略的字符
+    min_len: int
+    max_len: int
+
+    def accepts(self, s: str, chars: Set[str]) -> bool:
+        if not chars <= self.chars or len(s) < self.min_len:
+            return False
+        if len(s) <= self.max_len:
+            return True
+        # 去掉被忽略的字符之后的长度不会超过记号的总长度
+        return len(s) - sum(s.count(c) for c in chars & self.ignore) <= self.max_len
+
+
+# 由语法文件推导出的字符集合与长度范围, 预先计算以免每次启动时展开语法,
+# 修改语法文件后需要同步更新, 由测试 (RouterTest.test_prefilter_derived) 检查两者一致
+_NORM_DATE_FILTER = _Prefilter(
+    chars=frozenset(_DIGITS + "年月日号-/"),
+    ignore=frozenset(),
+    min_len=1,
+    max_len=12,
+)
+_CHINE_DATE_FILTER = _Prefilter(
+    chars=frozenset(
+        _DIGITS + "两今本当前这个明昨去后上半下以来之内年季度月周星期天日午 份第"
+    ),
+    ignore=frozenset(" 份度第"),
+    min_len=2,
+    max_len=8,
+)
+
+# 常规日期语法 (norm_date.lark) 中可能出现的全部字符, 该语法不忽略任何字符
+_NORM_DATE_CHARS = _NORM_DATE_FILTER.chars
+# 口语化日期语法 (chine_date.lark) 中可能出现的全部字符, 包括被忽略的字符
+_CHINE_DATE_CHARS = _CHINE_DATE_FILTER.chars
+
+
+def route(s: str) -> Tuple[str, ...]:
+    """在解析之前根据字符、长度与关键字选择可能识别该字符串的语法
+
+    字符集合与长度范围由语法文件推导, 只排除一定无法识别的语法, 不会拒绝任何可以识别的字符串。
+    返回的语法按尝试顺序排列, 常规日期语法在前, 返回空元组时字符串无法识别
+
+    Args:
+        s (str): 日期字符串
+
+    Returns:
+        Tuple[str, ...]: 需要尝试的语法名称, ``NORM_DATE`` 或 ``CHINE_DATE``
+    """
+    chars = set(s)
+    names = []
+    # 常规日期至少包含一个数字
+    if _NORM_DATE_FILTER.accepts(s, chars) and not chars.isdisjoint(_DIGITS):
+        names.append(NORM_DATE)
+    if _CHINE_DATE_FILTER.accepts(s, chars) and any(u in s for u in _CHINE_DATE_UNITS):
+        names.append(CHINE_DATE)
+    return tuple(names)
@@ -0,0 +1,49 @@
+from hashlib import sha256
+from os import path
+
+_DIR = path.dirname(__file__)
+
+
+def _load_standalone():
+    """加载打包时生成的独立解析器模块 cn2date/standalone.py
+
+    该模块包含 lark 运行时以及预先计算好的解析表, 使用它时无需在运行时编译语法,
+    也不会导入 lark 包。模块不存在或者与当前语法文件不一致时返回 None
+
+    Returns:
+        Optional[ModuleType]: 独立解析器模块
+    """
+    try:
+        from . import standalone
+    except ImportError:
+        return None
+
+    for name, digest in standalone.GRAMMAR_DIGESTS.items():
+        with open(path.join(_DIR, f"{name}.lark"), "rb") as f:
+            if sha256(f.read()).hexdigest() != digest:
+                return None
+    return standalone
+
+
+standalone = _load_standalone()
+
+# 解析树、转换器以及异常类型需要与解析器来自同一个运行时
+if standalone is not None:
+    from .standalone import (
+        Lark,
+        ParseError,
+        Transformer,
+        Tree,
+        UnexpectedCharacters,
+    )
+else:
+    from lark import Lark, ParseError, Transformer, Tree, UnexpectedCharacters
+
+__all__ = [
+    "Lark",
+    "ParseError",
+    "Transformer",
+    "Tree",
+    "UnexpectedCharacters",
+    "standalone",
+]
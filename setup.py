@@ -1,4 +1,16 @@
+import runpy
+from hashlib import sha256
+from os import path
+
 from setuptools import find_packages, setup
+from setuptools.command.build_py import build_py
+
+# 需要生成独立解析器的语法文件
+GRAMMARS = ["norm_date", "chine_date"]
+# lark standalone 工具的输出中, 运行时代码之后加载解析表的第一行
+STANDALONE_MARKER = "import pickle, zlib, base64"
+
+_ROOT = path.dirname(path.abspath(__file__))
 
 
 # 获取 README
@@ -8,6 +20,68 @@ def get_long_description() -> str:
     return long_description
 
 
+def gen_standalone(out_file: str):
+    """生成包含 lark 运行时以及各语法解析表的独立解析器模块
+
+    lark 自带的 standalone 工具会为每个语法重复输出一份运行时, 这里只保留一份运行时,
+    各语法的解析表通过 ``<name>_parser()`` 函数加载。
+    lark 的输出中找不到运行时的结束位置时抛出 ValueError
+    """
+    from lark import Lark
+    from lark.grammar import Rule
+    from lark.lexer import TerminalDef
+    from lark.tools.standalone import gen_standalone as lark_gen_standalone
+
+    options = runpy.run_path(path.join(_ROOT, "cn2date", "conf.py"))["PARSER_OPTIONS"]
+    lines = []
+    digests = {}
+    for name in GRAMMARS:
+        with open(path.join(_ROOT, "cn2date", f"{name}.lark"), "rb") as f:
+            grammar = f.read()
+        digests[name] = sha256(grammar).hexdigest()
+        lark = Lark(grammar.decode("utf8"), **options)
+
+        if not lines:
+            runtime = []
+            lark_gen_standalone(
+                lark, output=lambda *args: runtime.append(" ".join(map(str, args)))
+            )
+            if STANDALONE_MARKER not in runtime:
+                raise ValueError(
+                    f"{STANDALONE_MARKER!r} not found in lark standalone output"
+                )
+            lines += runtime[: runtime.index(STANDALONE_MARKER)]
+            lines += ["Shift = 0", "Reduce = 1"]
+
+        data, memo = lark.memo_serialize([TerminalDef, Rule])
+        lines += [
+            f"{name.upper()}_DATA = {data!r}",
+            f"{name.upper()}_MEMO = {memo!r}",
+            f"def {name}_parser(**kwargs):",
+            f"  return Lark._load_from_dict({name.upper()}_DATA, {name.upper()}_MEMO, **kwargs)",
+        ]
+    lines.append(f"GRAMMAR_DIGESTS = {digests!r}")
+
+    with open(out_file, "w", encoding="utf8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+class BuildPy(build_py):
+    """构建时生成独立解析器模块 cn2date/standalone.py, 使运行时无需编译语法"""
+
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+        try:
+            gen_standalone(path.join(self.build_lib, "cn2date", "standalone.py"))
+        except ImportError:
+            self.warn("lark is not installed, skip generating standalone parsers")
+        except ValueError as e:
+            # lark 的 standalone 输出格式改变时不中断构建, 运行时改为编译语法
+            self.warn(f"skip generating standalone parsers: {e}")
+
+
 if __name__ == "__main__":
     setup(
         name="cn2date",
@@ -19,7 +93,13 @@ if __name__ == "__main__":
         long_description=get_long_description(),
         long_description_content_type="text/markdown",
         packages=find_packages(),
-        install_requires=["lark", "python-dateutil", "cn2an"],
+        install_requires=["lark"],
+        extras_require={
+            "numpy": ["numpy"],
+            "pandas": ["numpy", "pandas"],
+            "arrow": ["numpy", "pyarrow"],
+        },
+        cmdclass={"build_py": BuildPy},
         include_package_data=True,
         python_requires=">=3.9",
         license="MIT License",